@@ -0,0 +1,148 @@
+import argparse
+import glob
+import os
+import sys
+import time
+from ico_generator import ICOGenerator
+from image_processor import ImageProcessor, ICOPalettizer
+from ico_cache import ICOCache
+from bulk_jobs import iter_target_files, run_bounded
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.gif')
+_caches = {}  # 워커 프로세스별 ICOCache (초기 디렉터리 스캔을 파일마다 반복하지 않도록)
+
+
+def get_cache(cache_dir, cache_size):
+    if not cache_dir:
+        return None
+    key = (cache_dir, cache_size)
+    if key not in _caches:
+        _caches[key] = ICOCache(cache_dir, cache_size)
+    return _caches[key]
+
+
+def iter_sources(target, recursive=False):
+    """
+    디렉터리 또는 glob 패턴에서 (원본 경로, 기준 디렉터리) 를 하나씩 생성
+    목록 전체를 메모리에 올리지 않도록 제너레이터로 순회한다.
+    """
+    if os.path.isdir(target):
+        yield from iter_target_files([target], IMAGE_EXTENSIONS, recursive)
+    else:
+        for path in glob.iglob(target, recursive=recursive):
+            if os.path.isfile(path) and path.lower().endswith(IMAGE_EXTENSIONS):
+                yield path, None
+
+
+def build_output_path(source_path, base_dir, output_dir):
+    """원본 경로에 대응하는 .ico 출력 경로 (디렉터리 입력이면 하위 구조 유지)"""
+    if base_dir:
+        relative = os.path.relpath(source_path, base_dir)
+    else:
+        relative = os.path.basename(source_path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0] + '.ico')
+
+
+def convert_one(source_path, output_path, selected_sizes, optimize=False, cache_dir=None, cache_size=None,
+                palettize=False, min_psnr=ICOPalettizer.DEFAULT_MIN_PSNR, engine='pillow', sharpen=False,
+                memory_limit=ImageProcessor.DEFAULT_MEMORY_LIMIT):
+    """
+    워커 프로세스에서 이미지 한 장을 ICO로 변환
+    ICO 바이트는 프로세스 간에 돌려보내지 않고 결과 메시지만 반환한다.
+    원본 디코딩 버퍼가 memory_limit 를 넘으면 띠 단위로 읽으며 축소한다 (None 이면 제한 없음).
+    """
+    start = time.perf_counter()
+    reports = []
+    try:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        # 가장 큰 해상도(+ 피라미드 여유 배율)까지만 디코딩
+        image, _ = ImageProcessor.load_reduced(source_path, max(selected_sizes) * ImageProcessor.PYRAMID_HEADROOM,
+                                               memory_limit)
+        with image:
+            if not ICOGenerator.validate_resolutions(image.size, selected_sizes):
+                success, message = False, f"유효한 해상도 없음: {image.size[0]}x{image.size[1]}"
+            else:
+                success, message, _ = ICOGenerator.create_ico(image, selected_sizes, output_path, optimize=optimize,
+                                                              report_callback=reports.append,
+                                                              cache=get_cache(cache_dir, cache_size),
+                                                              palettize=palettize, min_psnr=min_psnr,
+                                                              engine=engine, sharpen=sharpen)
+        if success and reports:
+            baseline = sum(row['baseline'] for row in reports[0])
+            best = sum(row['best'] for row in reports[0])
+            message += f", 최적화 {baseline} -> {best} bytes ({(baseline - best) / baseline * 100:.1f}% 절감)"
+    except Exception as e:
+        success, message = False, f"이미지 로드 실패: {str(e)}"
+    return source_path, output_path, success, message, time.perf_counter() - start
+
+
+def run_batch(sources, output_dir, selected_sizes, workers=None, max_pending=None, report=print, optimize=False,
+              cache_dir=None, cache_size=256 * 1024 * 1024, palettize=False, min_psnr=ICOPalettizer.DEFAULT_MIN_PSNR,
+              engine='pillow', sharpen=False, memory_limit=ImageProcessor.DEFAULT_MEMORY_LIMIT):
+    """
+    프로세스 풀로 일괄 변환
+    동시에 제출하는 작업 수를 max_pending 으로 제한해 입력 목록이 커져도 메모리가 일정하다.
+    """
+    summary = {'total': 0, 'succeeded': 0, 'failed': 0, 'elapsed': 0.0, 'files_per_sec': 0.0}
+
+    def handle(result):
+        source_path, output_path, success, message, elapsed = result
+        summary['total'] += 1
+        if success:
+            summary['succeeded'] += 1
+            report(f"[OK]   {source_path} -> {output_path} ({elapsed:.2f}s) {message}")
+        else:
+            summary['failed'] += 1
+            report(f"[FAIL] {source_path} ({elapsed:.2f}s) {message}")
+
+    jobs = ((source_path, build_output_path(source_path, base_dir, output_dir), selected_sizes, optimize,
+             cache_dir, cache_size, palettize, min_psnr, engine, sharpen, memory_limit)
+            for source_path, base_dir in sources)
+    return run_bounded(convert_one, jobs, handle, summary, {'files_per_sec': 'total'}, workers, max_pending)
+
+
+def parse_sizes(value):
+    """'256,128,64' 형식의 해상도 목록 파싱"""
+    try:
+        sizes = [int(s) for s in value.split(',') if s.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"잘못된 해상도 목록: {value}")
+    invalid = [s for s in sizes if s not in ICOGenerator.RESOLUTIONS]
+    if invalid or not sizes:
+        raise argparse.ArgumentTypeError(f"지원하지 않는 해상도: {invalid or value}")
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="이미지 폴더/패턴을 ICO 파일로 일괄 변환")
+    parser.add_argument("input", help="이미지 디렉터리 또는 glob 패턴 (예: 'images/**/*.png')")
+    parser.add_argument("-o", "--output", default="ico_output", help="ICO 출력 디렉터리")
+    parser.add_argument("-s", "--sizes", type=parse_sizes, default=list(ICOGenerator.RESOLUTIONS),
+                        help="쉼표로 구분한 해상도 목록 (기본: 전체)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="하위 디렉터리(또는 ** 패턴)까지 탐색")
+    parser.add_argument("--optimize", action="store_true", help="엔트리마다 가장 작은 무손실 인코딩 선택")
+    parser.add_argument("--palettize", action="store_true", help="16~32px 엔트리를 8/4비트 팔레트 BMP 로 (품질 기준 이상일 때만)")
+    parser.add_argument("--min-psnr", type=float, default=ICOPalettizer.DEFAULT_MIN_PSNR,
+                        help="팔레트 변환 허용 최소 PSNR (dB)")
+    parser.add_argument("--engine", choices=ImageProcessor.ENGINES, default='pillow', help="축소 엔진")
+    parser.add_argument("--sharpen", action="store_true", help="작은 해상도 선명화 (--engine numpy 에서만)")
+    parser.add_argument("--memory-limit", type=int, default=ImageProcessor.DEFAULT_MEMORY_LIMIT // (1024 * 1024),
+                        help="원본 디코딩 메모리 한도 (MB, 0 이면 제한 없음). 넘으면 띠 단위로 축소하며, 이는 JPEG(draft) 와 "
+                             "BMP/PPM/비압축 TIFF 만 지원 (PNG, 압축 TIFF 는 한도를 넘으면 오류)")
+    parser.add_argument("--cache-dir", default=None, help="결과 캐시 디렉터리 (같은 입력이면 인코딩 생략)")
+    parser.add_argument("--cache-size", type=int, default=256, help="캐시 최대 크기 (MB)")
+    args = parser.parse_args(argv)
+
+    sources = iter_sources(args.input, recursive=args.recursive)
+    summary = run_batch(sources, args.output, args.sizes, workers=args.workers, optimize=args.optimize,
+                        cache_dir=args.cache_dir, cache_size=args.cache_size * 1024 * 1024,
+                        palettize=args.palettize, min_psnr=args.min_psnr, engine=args.engine, sharpen=args.sharpen,
+                        memory_limit=args.memory_limit * 1024 * 1024 or None)
+    print(f"완료: 총 {summary['total']}개, 성공 {summary['succeeded']}개, 실패 {summary['failed']}개, "
+          f"{summary['elapsed']:.2f}초 ({summary['files_per_sec']:.1f} files/s)")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import PIL
+from benchmark_resample import make_synthetic_image
+from ico_generator import ICOGenerator
+from ico_parser import ICOFile
+from preview_cache import PreviewCache
+
+DEFAULT_SOURCES = (256, 1024, 4096)
+STAGES = ('generate', 'parse', 'decode', 'preview')
+PROC_STATUS = '/proc/self/status'
+PROC_CLEAR_REFS = '/proc/self/clear_refs'  # '5' 를 쓰면 최대 RSS (VmHWM) 를 현재 RSS 로 초기화 (Linux)
+
+
+def memory_method():
+    """
+    단계별 최대 메모리 측정 방식
+    'vmhwm': Linux 에서 단계마다 최대 RSS 를 초기화해 측정 (Pillow 의 C 할당 포함)
+    'tracemalloc': 그 외 플랫폼, 파이썬 할당만 측정
+    ru_maxrss 는 프로세스 전체의 최고치라 앞 단계보다 작은 단계는 0 이 되므로 쓰지 않는다.
+    """
+    return 'vmhwm' if os.access(PROC_CLEAR_REFS, os.W_OK) else 'tracemalloc'
+
+
+def read_rss_kb():
+    """(현재 RSS, 최대 RSS) KB"""
+    values = {}
+    with open(PROC_STATUS) as f:
+        for line in f:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                name, value = line.split(':')
+                values[name] = int(value.split()[0])
+    return values['VmRSS'], values['VmHWM']
+
+
+def measure(func, repeat, method):
+    """func 를 repeat 번 실행해 (중앙값 초, 단계 시작 시점 대비 추가 최대 메모리 KB) 반환"""
+    times = []
+    if method == 'vmhwm':
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        before, _ = read_rss_kb()
+    else:
+        tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    if method == 'vmhwm':
+        peak_kb = max(0, read_rss_kb()[1] - before)
+    else:
+        peak_kb = tracemalloc.get_traced_memory()[1] // 1024
+        tracemalloc.stop()
+    return statistics.median(times), peak_kb
+
+
+def run_case(args):
+    """
+    원본 크기/알파 조합 하나를 측정 (케이스마다 새 프로세스에서 실행되어 최대 메모리가 섞이지 않음)
+    단계: generate(create_ico) -> parse(ICOFile) -> decode(전체 엔트리) -> preview(미리보기 변환)
+    """
+    source_size, alpha, repeat = args
+    method = memory_method()
+    image = make_synthetic_image(source_size, alpha)
+    image.load()
+    case = f"src{source_size}_{'rgba' if alpha else 'rgb'}"
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'bench.ico')
+
+        def generate():
+            success, message, _ = ICOGenerator.create_ico(image, ICOGenerator.RESOLUTIONS, output_path)
+            if not success:
+                raise RuntimeError(message)
+
+        def parse():
+            with ICOFile(output_path) as ico_file:
+                [entry.as_dict() for entry in ico_file.entries]
+
+        state = {}
+
+        def decode():
+            with ICOFile(output_path) as ico_file:
+                state['decoded'] = [ico_file.decode(i) for i in range(len(ico_file))]
+
+        def preview():
+            [PreviewCache.make_preview(decoded.copy()) for decoded in state['decoded']]
+
+        for stage, func in zip(STAGES, (generate, parse, decode, preview)):
+            seconds, peak_kb = measure(func, repeat, method)
+            results.append({'case': case, 'stage': stage, 'seconds': seconds, 'peak_kb': peak_kb})
+    return results
+
+
+def run_suite(source_sizes, repeat):
+    cases = [(size, alpha, repeat) for size in source_sizes for alpha in (True, False)]
+    results = []
+    # 케이스마다 새 프로세스 (maxtasksperchild=1) 를 사용해 측정 간 메모리/캐시 영향을 없앤다
+    with multiprocessing.Pool(processes=1, maxtasksperchild=1) as pool:
+        for case_results in pool.imap(run_case, cases):
+            results.extend(case_results)
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'memory': memory_method(),
+            'repeat': repeat,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, tolerance, min_delta=0.0):
+    """
+    기준 결과 대비 (case, stage) 별 시간 비율 비교, 회귀 목록 반환
+    비율이 tolerance 를 넘어도 늘어난 시간이 min_delta 초 이하이면 측정 잡음으로 보고 회귀로 치지 않는다.
+    """
+    base = {(r['case'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        reference = base.get((result['case'], result['stage']))
+        if not reference or not reference['seconds']:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        result['baseline_seconds'] = reference['seconds']
+        result['ratio'] = ratio
+        if ratio > 1 + tolerance and result['seconds'] - reference['seconds'] > min_delta:
+            regressions.append(result)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ICO 생성/파싱/디코딩/미리보기 벤치마크 (디스플레이 불필요)")
+    parser.add_argument("--sources", default=','.join(map(str, DEFAULT_SOURCES)), help="합성 원본 크기 목록")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수 (중앙값 사용)")
+    parser.add_argument("-o", "--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 기준 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="허용 시간 증가율 (기본 15%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="이 시간(ms) 이하로 늘어난 단계는 비율과 관계없이 회귀로 보지 않음 (기본 1ms)")
+    args = parser.parse_args(argv)
+
+    source_sizes = [int(s) for s in args.sources.split(',') if s.strip()]
+    current = run_suite(source_sizes, args.repeat)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(current, json.load(f), args.tolerance, args.min_delta_ms / 1000)
+
+    for result in current['results']:
+        ratio = f"  x{result['ratio']:.2f}" if 'ratio' in result else ""
+        print(f"{result['case']:<14} {result['stage']:<8} {result['seconds'] * 1000:9.2f}ms "
+              f"{result['peak_kb']:>8}KB{ratio}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+
+    if regressions:
+        print(f"성능 회귀 {len(regressions)}건 (허용 {args.tolerance * 100:.0f}% 및 {args.min_delta_ms:g}ms 초과):")
+        for result in regressions:
+            print(f"  {result['case']} {result['stage']}: {result['baseline_seconds'] * 1000:.2f}ms -> "
+                  f"{result['seconds'] * 1000:.2f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+import argparse
+import io
+import math
+import sys
+import time
+from PIL import Image, ImageChops, ImageDraw, ImageStat
+from ico_generator import ICOGenerator
+from image_processor import ImageProcessor
+
+
+def make_synthetic_image(size, alpha=True):
+    """그라데이션 + 세밀한 선 패턴으로 구성된 벤치마크용 원본 이미지 생성"""
+    gradient = Image.linear_gradient('L').resize((size, size))
+    radial = Image.radial_gradient('L').resize((size, size))
+    image = Image.merge('RGB', (gradient, radial, gradient.transpose(Image.Transpose.ROTATE_90)))
+    draw = ImageDraw.Draw(image)
+    step = max(4, size // 128)
+    for x in range(0, size, step * 3):
+        draw.line([(x, 0), (size - x, size)], fill=(255, 255, 255), width=max(1, step // 4))
+    if alpha:
+        mask = Image.new('L', (size, size), 0)
+        ImageDraw.Draw(mask).ellipse([size // 16, size // 16, size - size // 16, size - size // 16], fill=255)
+        image.putalpha(mask)
+    return image
+
+
+def psnr(reference, candidate):
+    """두 이미지 사이의 PSNR (dB, premultiplied 기준이라 완전 투명 픽셀의 색은 무시), 동일하면 inf"""
+    diff = ImageChops.difference(reference.convert('RGBa'), candidate.convert('RGBa'))
+    stat = ImageStat.Stat(diff)
+    pixels = reference.size[0] * reference.size[1]
+    mse = sum(stat.sum2) / (pixels * len(stat.sum2))
+    return math.inf if mse == 0 else 10 * math.log10(255 ** 2 / mse)
+
+
+def time_legacy(image, sizes):
+    """기존 경로: 원본 그대로 Pillow ICO 저장 (각 해상도를 원본에서 리샘플)"""
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    image.save(buffer, format='ICO', sizes=[(s, s) for s in sizes])
+    return time.perf_counter() - start
+
+
+def time_pyramid(image, sizes, resample):
+    """피라미드 경로: ICOGenerator.create_ico 와 동일한 프레임 생성 + ICO 저장"""
+    start = time.perf_counter()
+    pyramid = ImageProcessor.build_pyramid(image, sizes, resample)
+    frames = [pyramid[s] for s in sorted(pyramid, reverse=True)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format='ICO', sizes=[(s, s) for s in sizes], append_images=frames[1:])
+    return time.perf_counter() - start, pyramid
+
+
+def time_vectorized(image, sizes, resample, sharpen=False):
+    """NumPy 경로: build_pyramid_vectorized (premultiplied 분리형 행렬 축소) + ICO 저장"""
+    start = time.perf_counter()
+    pyramid = ImageProcessor.build_pyramid_vectorized(image, sizes, resample, sharpen)
+    frames = [pyramid[s] for s in sorted(pyramid, reverse=True)]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, format='ICO', sizes=[(s, s) for s in sizes], append_images=frames[1:])
+    return time.perf_counter() - start, pyramid
+
+
+def run(source_sizes, sizes, resample, repeat):
+    results = []
+    for source_size in source_sizes:
+        image = make_synthetic_image(source_size)
+        legacy = min(time_legacy(image, sizes) for _ in range(repeat))
+        pyramid_times = []
+        for _ in range(repeat):
+            elapsed, pyramid = time_pyramid(image, sizes, resample)
+            pyramid_times.append(elapsed)
+        vectorized_times = []
+        for _ in range(repeat):
+            elapsed, vectorized = time_vectorized(image, sizes, resample)
+            vectorized_times.append(elapsed)
+        # 품질: 원본에서 한 번에 LANCZOS 축소한 결과(기존 경로와 동일)를 기준으로 한 PSNR
+        references = {size: ImageProcessor.fit_square(image, size, Image.Resampling.LANCZOS) for size in pyramid}
+        results.append({
+            'source': source_size,
+            'legacy_sec': legacy,
+            'pyramid_sec': min(pyramid_times),
+            'vectorized_sec': min(vectorized_times),
+            'psnr': {size: psnr(references[size], frame) for size, frame in pyramid.items()},
+            'vectorized_psnr': {size: psnr(references[size], frame) for size, frame in vectorized.items()},
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="해상도 피라미드 / NumPy 축소 vs 기존 Pillow ICO 저장 경로 벤치마크")
+    parser.add_argument("--sources", default="1024,4096,8192", help="원본 크기 목록 (정사각형)")
+    parser.add_argument("--resample", default=ImageProcessor.DEFAULT_RESAMPLE,
+                        choices=sorted(ImageProcessor.RESAMPLE_FILTERS), help="피라미드 최종 축소 필터")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    args = parser.parse_args(argv)
+
+    source_sizes = [int(s) for s in args.sources.split(',')]
+    for result in run(source_sizes, ICOGenerator.RESOLUTIONS, args.resample, args.repeat):
+        speedup = result['legacy_sec'] / result['pyramid_sec'] if result['pyramid_sec'] else 0
+        worst = min(result['psnr'].values())
+        print(f"{result['source']:>6}px  기존 {result['legacy_sec']:.3f}s  피라미드 {result['pyramid_sec']:.3f}s  "
+              f"x{speedup:.1f}  최저 PSNR {worst:.1f}dB")
+        print("        " + "  ".join(f"{size}:{value:.1f}" for size, value in sorted(result['psnr'].items(), reverse=True)))
+        print(f"        NumPy {result['vectorized_sec']:.3f}s  최저 PSNR {min(result['vectorized_psnr'].values()):.1f}dB")
+        print("        " + "  ".join(f"{size}:{value:.1f}"
+                                     for size, value in sorted(result['vectorized_psnr'].items(), reverse=True)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
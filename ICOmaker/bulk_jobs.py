@@ -0,0 +1,65 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+
+def iter_chunks(iterable, size):
+    """iterable 을 size 개씩 묶은 리스트로 (워커에 파일 여러 개를 한 번에 넘겨 프로세스 간 통신 비용을 줄임)"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_target_files(targets, extensions, recursive=True):
+    """
+    파일/디렉터리 목록에서 (경로, 기준 디렉터리) 를 하나씩 생성
+    디렉터리는 extensions 로 끝나는 파일만 이름 순으로 (recursive=True 이면 하위까지) 찾고,
+    파일로 준 대상은 확장자와 관계없이 그대로 넘긴다 (기준 디렉터리 None).
+    """
+    for target in targets:
+        if not os.path.isdir(target):
+            yield target, None
+            continue
+        for root, dirs, files in os.walk(target):
+            dirs.sort()
+            if not recursive:
+                dirs.clear()
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(root, name), target
+
+
+def run_bounded(func, jobs, handle, summary, rates, workers=None, max_pending=None, executor_class=ProcessPoolExecutor):
+    """
+    jobs 의 인자 튜플마다 func(*job) 을 워커 풀에 제출하고, 끝난 결과를 handle(result) 로 넘김
+    제출된 작업 수를 max_pending (기본: 워커 수의 4배) 으로 제한해 jobs 전체를 메모리에 올리지 않는다.
+    끝나면 summary 에 'elapsed' 와 rates ({속도 키: 개수 키}) 의 초당 처리량을 기록해 반환한다.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or workers * 4
+    start = time.perf_counter()
+
+    def collect(done):
+        for future in done:
+            handle(future.result())
+
+    with executor_class(max_workers=workers) as executor:
+        pending = set()
+        for job in jobs:
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(func, *job))
+        if pending:
+            done, _ = wait(pending)
+            collect(done)
+
+    summary['elapsed'] = time.perf_counter() - start
+    for rate_key, count_key in rates.items():
+        summary[rate_key] = summary[count_key] / summary['elapsed'] if summary['elapsed'] > 0 else 0.0
+    return summary
@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from ico_generator import ICOGenerator
+from image_processor import ImageProcessor
+from batch_convert import parse_sizes
+from bulk_jobs import iter_target_files, run_bounded
+
+FRAME_EXTENSIONS = ('.gif', '.png', '.apng', '.tif', '.tiff', '.webp')
+
+
+def iter_frames(source_path, min_size):
+    """
+    다중 프레임 원본 (GIF, APNG, 다중 페이지 TIFF) 에서 (인덱스, 전체 프레임 수, RGBA 프레임, 축소 배율) 을 하나씩 생성
+    프레임은 순서대로 seek 하며 하나씩만 디코딩하고, min_size 의 2배 이상 크면 바로 정수 배 축소해 넘긴다.
+    (GIF/APNG 의 이전 프레임 합성/dispose 는 Pillow 가 seek 시점에 처리)
+    프레임은 통째로 디코딩하므로 Pillow 의 압축 폭탄 검사 (MAX_IMAGE_PIXELS) 는 그대로 둔다.
+    """
+    with Image.open(source_path) as image:
+        count = getattr(image, 'n_frames', 1)
+        for index in range(count):
+            image.seek(index)
+            frame = image.convert('RGBA')
+            factor = max(1, min(frame.size) // min_size) if min_size else 1
+            if factor >= 2:
+                frame = frame.reduce(factor)
+            yield index, count, frame, factor
+
+
+def frame_output_path(source_path, output_dir, index, count, ext):
+    """프레임별 출력 경로 (한 프레임이면 원본 이름 그대로, 여러 프레임이면 _000 처럼 번호를 붙임)"""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    if count == 1:
+        return os.path.join(output_dir, stem + ext)
+    digits = max(3, len(str(count - 1)))
+    return os.path.join(output_dir, f"{stem}_{index:0{digits}d}{ext}")
+
+
+def convert_frame(frame, output_path, selected_sizes, hotspot=None, optimize=False):
+    """프레임 한 장을 ICO (hotspot 이 있으면 CUR) 로 저장, (출력 경로, 성공 여부, 메시지, 소요 시간) 반환"""
+    start = time.perf_counter()
+    with frame:
+        # 프레임 사이에서 병렬로 처리하므로 프레임 안의 엔트리 인코딩은 한 스레드에서
+        success, message, _ = ICOGenerator.create_ico(frame, selected_sizes, output_path, workers=1,
+                                                      optimize=optimize, hotspot=hotspot)
+    return output_path, success, message, time.perf_counter() - start
+
+
+def convert_frames(sources, output_dir, selected_sizes, cursor=False, hotspot=(0, 0), workers=None,
+                   max_pending=None, optimize=False, report=print):
+    """
+    원본마다 프레임을 하나씩 디코딩해 스레드 풀에 넘기고 프레임별 ICO/CUR 을 저장
+    제출된 프레임 수를 max_pending 으로 제한해 프레임이 수백 장이어도 메모리에 올라가는 프레임 수가 일정하다.
+    hotspot 은 원본 좌표 기준이며 엔트리 크기마다 환산된다 (cursor=True 일 때만 사용).
+    """
+    workers = workers or os.cpu_count() or 1
+    ext = '.cur' if cursor else '.ico'
+    min_size = max(selected_sizes) * ImageProcessor.PYRAMID_HEADROOM
+    summary = {'sources': 0, 'frames': 0, 'succeeded': 0, 'failed': 0, 'elapsed': 0.0, 'frames_per_sec': 0.0}
+    os.makedirs(output_dir, exist_ok=True)
+
+    def handle(result):
+        output_path, success, message, elapsed = result
+        summary['frames'] += 1
+        if success:
+            summary['succeeded'] += 1
+            report(f"[OK]   {output_path} ({elapsed:.2f}s) {message}")
+        else:
+            summary['failed'] += 1
+            report(f"[FAIL] {output_path} ({elapsed:.2f}s) {message}")
+
+    def jobs():
+        for source_path in sources:
+            summary['sources'] += 1
+            try:
+                for index, count, frame, factor in iter_frames(source_path, min_size):
+                    output_path = frame_output_path(source_path, output_dir, index, count, ext)
+                    # 핫스팟은 원본 좌표이므로 축소된 프레임 좌표로 바꿔 넘김
+                    frame_hotspot = (hotspot[0] // factor, hotspot[1] // factor) if cursor else None
+                    yield frame, output_path, selected_sizes, frame_hotspot, optimize
+            except Exception as e:
+                summary['failed'] += 1
+                report(f"[FAIL] {source_path} 프레임 읽기 실패: {str(e)}")
+
+    return run_bounded(convert_frame, jobs(), handle, summary, {'frames_per_sec': 'frames'}, workers,
+                       max_pending or workers * 2, ThreadPoolExecutor)
+
+
+def parse_hotspot(value):
+    """'x,y' 형식의 핫스팟 (원본 픽셀 좌표) 파싱"""
+    try:
+        x, y = (int(v) for v in value.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"잘못된 핫스팟: {value} (예: 0,0)")
+    if x < 0 or y < 0:
+        raise argparse.ArgumentTypeError(f"핫스팟은 0 이상이어야 합니다: {value}")
+    return x, y
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="다중 프레임 이미지 (GIF, APNG, TIFF) 를 프레임마다 ICO/CUR 로 변환")
+    parser.add_argument("targets", nargs='+', help="원본 파일 또는 디렉터리")
+    parser.add_argument("-o", "--output", default="ico_frames", help="출력 디렉터리")
+    parser.add_argument("-s", "--sizes", type=parse_sizes, default=[48, 32],
+                        help="쉼표로 구분한 해상도 목록 (기본: 48,32)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="동시에 변환할 프레임 수 (기본: CPU 수)")
+    parser.add_argument("--cur", action="store_true", help="ICO 대신 커서(.cur) 로 저장")
+    parser.add_argument("--hotspot", type=parse_hotspot, default=(0, 0), help="커서 핫스팟 (원본 픽셀 좌표 x,y)")
+    parser.add_argument("--optimize", action="store_true", help="엔트리마다 가장 작은 무손실 인코딩 선택")
+    args = parser.parse_args(argv)
+
+    # 디렉터리는 바로 아래 파일만
+    sources = (path for path, _ in iter_target_files(args.targets, FRAME_EXTENSIONS, recursive=False))
+    summary = convert_frames(sources, args.output, args.sizes, cursor=args.cur,
+                             hotspot=args.hotspot, workers=args.workers, optimize=args.optimize)
+    print(f"완료: 원본 {summary['sources']}개, 프레임 {summary['frames']}개 (성공 {summary['succeeded']}, "
+          f"실패 {summary['failed']}), {summary['elapsed']:.2f}초 ({summary['frames_per_sec']:.1f} frames/s)")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
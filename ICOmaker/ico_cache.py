@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zlib
+import PIL
+
+
+class ICOCache:
+    """
+    ICO 결과 디스크 캐시 (내용 주소 방식)
+    키는 원본 픽셀 + 해상도 목록 + 인코더 설정의 SHA-256 이며,
+    전체 크기가 max_bytes 를 넘으면 가장 오래 사용하지 않은 파일부터 지운다 (사용 시 mtime 갱신).
+    """
+    # 인코딩 결과가 달라지는 변경을 하면 올려서 기존 캐시를 무효화
+    ENCODER_VERSION = 1
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._total = sum(size for _, size, _ in self._scan())
+
+    @staticmethod
+    def make_key(image, sizes, settings=None):
+        """원본 픽셀과 해상도/인코더 설정으로 캐시 키 생성"""
+        digest = hashlib.sha256()
+        meta = {
+            'version': ICOCache.ENCODER_VERSION,
+            'pillow': PIL.__version__,
+            'zlib': zlib.ZLIB_RUNTIME_VERSION,
+            'mode': image.mode,
+            'size': image.size,
+            'sizes': sorted(set(sizes)),
+            'settings': settings or {},
+        }
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode('utf-8'))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.ico')
+
+    def _scan(self):
+        """(경로, 크기, 마지막 사용 시각) 목록"""
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith('.ico'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # 다른 프로세스가 방금 지운 경우
+                yield path, stat.st_size, stat.st_mtime
+
+    @staticmethod
+    def _copy_replace(source_path, dest_path):
+        """대상 폴더의 임시 파일에 복사한 뒤 교체 (중간에 실패해도 대상이 반쯤 쓰인 채로 남지 않음)"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest_path)), suffix='.tmp')
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def fetch(self, key, output_path):
+        """캐시에 있으면 output_path 로 복사하고 True (파일 내용을 메모리에 올리지 않음)"""
+        path = self._path(key)
+        try:
+            self._copy_replace(path, output_path)
+            os.utime(path)  # LRU 순서 갱신
+            return True
+        except FileNotFoundError:
+            return False
+
+    def store(self, key, source_path):
+        """완성된 ICO 파일을 캐시에 복사 (임시 파일에 쓴 뒤 rename 하므로 여러 프로세스가 같은 캐시를 써도 안전)"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.path.getsize(path)  # 같은 키를 덮어쓰면 이전 크기는 빼고 계산
+        except FileNotFoundError:
+            replaced = 0
+        self._copy_replace(source_path, path)
+        self._total += os.path.getsize(path) - replaced
+        if self._total > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """오래 사용하지 않은 항목부터 지워 max_bytes 이하로 맞춤"""
+        items = sorted(self._scan(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in items)
+        for path, size, _ in items:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total = total
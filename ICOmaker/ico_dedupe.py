@@ -0,0 +1,252 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from itertools import groupby
+from ico_parser import ICOFile, ICOParseError
+from ico_scanner import iter_ico_files
+from bulk_jobs import iter_chunks, run_bounded
+from ico_extract import decode_entry
+
+INDEX_NAME = '.icomaker_index.sqlite'
+# 해시 방식이나 스키마가 바뀌면 올려서 기존 색인을 다시 만들게 함
+INDEX_VERSION = 1
+LISTED_ENTRIES = 5  # 묶음마다 콘솔에 보여 줄 엔트리 수 (JSON 에는 전부 기록)
+_readers = {}  # 워커 프로세스별 읽기 전용 색인 연결 (파일마다 다시 열지 않도록)
+
+
+def pixel_digest(image):
+    """디코딩한 RGBA 픽셀 해시 (크기도 포함해 같은 바이트열의 다른 크기와 구분)"""
+    digest = hashlib.sha256(f"{image.size[0]}x{image.size[1]}".encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def get_reader(index_path):
+    """
+    워커용 읽기 전용 연결 (메인 프로세스가 쓰는 중에도 WAL 모드라 읽을 수 있음)
+    색인 파일이 아직 없으면 None.
+    """
+    if index_path not in _readers:
+        try:
+            _readers[index_path] = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            return None
+    return _readers[index_path]
+
+
+def hash_file(path, index_path=None):
+    """
+    ICO 파일 한 개의 엔트리별 (원본 바이트 해시, 픽셀 해시) 계산
+    원본 바이트 해시가 색인에 이미 있으면 픽셀 해시를 재사용하고 디코딩하지 않는다.
+    반환값: (경로, 성공 여부, 메시지, 엔트리 행 목록, 디코딩한 엔트리 수)
+    """
+    rows = []
+    decoded = 0
+    reader = get_reader(index_path) if index_path else None
+    try:
+        with ICOFile(path) as ico_file:
+            for entry in ico_file.entries:
+                raw_hash = hashlib.sha256(entry.data).hexdigest()
+                pixel_hash = None
+                if reader is not None:
+                    try:
+                        known = reader.execute("SELECT pixel_sha256 FROM entries WHERE raw_sha256 = ? "
+                                               "AND pixel_sha256 IS NOT NULL LIMIT 1", (raw_hash,)).fetchone()
+                    except sqlite3.OperationalError:
+                        known = None  # 스키마를 만들기 전에 연 경우
+                    pixel_hash = known[0] if known else None
+                if pixel_hash is None:
+                    try:
+                        pixel_hash = pixel_digest(decode_entry(entry))
+                        decoded += 1
+                    except Exception:
+                        pass  # 디코딩할 수 없는 엔트리는 원본 바이트로만 비교
+                rows.append((entry.index, entry.width, entry.height, entry.bit_count, entry.offset, entry.size,
+                             raw_hash, pixel_hash))
+    except (ICOParseError, OSError, ValueError) as e:
+        return path, False, str(e), [], decoded
+    return path, True, f"{len(rows)}개 엔트리", rows, decoded
+
+
+def hash_chunk(paths, index_path):
+    """워커 프로세스 작업 단위 (파일 여러 개를 묶어 프로세스 간 통신 비용을 줄임)"""
+    return [hash_file(path, index_path) for path in paths]
+
+
+class HashIndex:
+    """
+    엔트리 해시 색인 (SQLite)
+    파일별 stat (mtime, 크기) 을 함께 저장해 다음 실행에서 바뀌지 않은 파일은 다시 읽지 않고,
+    엔트리별 디렉터리 값 (오프셋, 크기 등) 과 원본 바이트 / 디코딩 픽셀 SHA-256 을 보관한다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")  # 워커의 읽기와 메인 프로세스의 쓰기를 동시에
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS entries; DROP TABLE IF EXISTS files;")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL);
+            CREATE TABLE IF NOT EXISTS entries (
+                path TEXT NOT NULL, idx INTEGER NOT NULL, width INTEGER, height INTEGER, bit_count INTEGER,
+                offset INTEGER, size INTEGER, raw_sha256 TEXT NOT NULL, pixel_sha256 TEXT,
+                PRIMARY KEY (path, idx));
+            CREATE INDEX IF NOT EXISTS entries_raw ON entries (raw_sha256);
+            CREATE INDEX IF NOT EXISTS entries_pixel ON entries (pixel_sha256);
+        """)
+        self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.conn.commit()
+
+    def is_current(self, path, stat):
+        row = self.conn.execute("SELECT mtime_ns, size FROM files WHERE path = ?", (path,)).fetchone()
+        return row is not None and row == (stat.st_mtime_ns, stat.st_size)
+
+    def update(self, path, stat, rows):
+        """파일의 엔트리 행을 통째로 교체 (커밋은 commit() 에서 묶어서)"""
+        self.conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+        self.conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                              [(path,) + row for row in rows])
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)", (path, stat.st_mtime_ns, stat.st_size))
+
+    def discard(self, path):
+        self.conn.execute("DELETE FROM entries WHERE path = ?", (path,))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def prune_missing(self):
+        """디스크에서 사라진 파일의 기록 삭제, 삭제한 파일 수 반환"""
+        missing = [path for (path,) in self.conn.execute("SELECT path FROM files") if not os.path.exists(path)]
+        for path in missing:
+            self.discard(path)
+        self.commit()
+        return len(missing)
+
+    def commit(self):
+        self.conn.commit()
+
+    def groups(self, column):
+        """column 해시가 같은 엔트리가 2개 이상인 묶음 (낭비 바이트가 큰 순서)"""
+        groups = []
+        rows = self.conn.execute(
+            f"SELECT e.{column}, e.path, e.idx, e.width, e.height, e.size, e.raw_sha256 FROM entries e "
+            f"JOIN (SELECT {column} AS digest FROM entries WHERE {column} IS NOT NULL "
+            f"GROUP BY {column} HAVING COUNT(*) > 1) d ON e.{column} = d.digest "
+            f"ORDER BY e.{column}, e.path, e.idx")
+        for digest, group_rows in groupby(rows, key=lambda row: row[0]):
+            members = [row[1:] for row in group_rows]
+            groups.append({
+                'hash': digest,
+                'count': len(members),
+                'encodings': len({member[5] for member in members}),
+                'wasted_bytes': sum(member[4] for member in members) - min(member[4] for member in members),
+                'entries': [{'path': path, 'entry': idx + 1, 'width': width, 'height': height, 'size': size}
+                            for path, idx, width, height, size, _ in members],
+            })
+        groups.sort(key=lambda group: group['wasted_bytes'], reverse=True)
+        return groups
+
+    def exact_duplicates(self):
+        """원본 바이트가 완전히 같은 엔트리 묶음"""
+        return self.groups('raw_sha256')
+
+    def pixel_duplicates(self):
+        """인코딩(PNG/BMP, 압축 수준 등)은 다르지만 디코딩한 픽셀이 같은 엔트리 묶음"""
+        return [group for group in self.groups('pixel_sha256') if group['encodings'] > 1]
+
+    def close(self):
+        self.conn.close()
+
+
+def run_index(paths, index, workers=None, chunk_size=32, report=print):
+    """
+    바뀐 파일만 워커 풀로 해시해 색인 갱신
+    제출된 묶음 수를 워커 수의 몇 배로 제한해 경로 목록 전체를 메모리에 올리지 않는다.
+    """
+    summary = {'files': 0, 'unchanged': 0, 'hashed': 0, 'failed': 0, 'entries': 0, 'decoded': 0,
+               'elapsed': 0.0, 'files_per_sec': 0.0}
+    stats = {}  # 제출한 파일의 stat (색인에는 해시를 시작하기 전 stat 을 기록)
+
+    def changed_paths():
+        for path in paths:
+            summary['files'] += 1
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                summary['failed'] += 1
+                report(f"[FAIL] {path} {e}")
+                continue
+            if index.is_current(path, stat):
+                summary['unchanged'] += 1
+                continue
+            stats[path] = stat
+            yield path
+
+    def handle(results):
+        for path, success, message, rows, decoded in results:
+            stat = stats.pop(path)
+            summary['decoded'] += decoded
+            if not success:
+                summary['failed'] += 1
+                index.discard(path)
+                report(f"[FAIL] {path} {message}")
+                continue
+            summary['hashed'] += 1
+            summary['entries'] += len(rows)
+            index.update(path, stat, rows)
+        index.commit()
+
+    jobs = ((chunk, index.path) for chunk in iter_chunks(changed_paths(), chunk_size))
+    return run_bounded(hash_chunk, jobs, handle, summary, {'files_per_sec': 'files'}, workers)
+
+
+def format_groups(title, groups, top):
+    lines = [f"{title}: {len(groups)}묶음, 낭비 {sum(g['wasted_bytes'] for g in groups) / 1024:.1f}KB"]
+    for group in groups[:top]:
+        first = group['entries'][0]
+        lines.append(f"  {first['width']}x{first['height']} x{group['count']} (인코딩 {group['encodings']}종, "
+                     f"낭비 {group['wasted_bytes']} bytes) {group['hash'][:12]}")
+        lines.extend(f"    {e['path']} #{e['entry']} ({e['size']} bytes)" for e in group['entries'][:LISTED_ENTRIES])
+        if group['count'] > LISTED_ENTRIES:
+            lines.append(f"    ... 외 {group['count'] - LISTED_ENTRIES}개")
+    if len(groups) > top:
+        lines.append(f"  ... 외 {len(groups) - top}묶음")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ICO 엔트리 중복 검사 (원본 바이트 / 디코딩 픽셀 해시, 색인은 다음 실행에 재사용)")
+    parser.add_argument("targets", nargs='+', help="검사할 .ico 파일 또는 디렉터리")
+    parser.add_argument("--index", default=INDEX_NAME, help=f"해시 색인 파일 (기본: {INDEX_NAME})")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("-o", "--output", default=None, help="중복 묶음을 JSON 으로 저장할 경로")
+    parser.add_argument("--top", type=int, default=10, help="종류별로 출력할 묶음 수")
+    parser.add_argument("--prune", action="store_true", help="디스크에서 사라진 파일을 색인에서 삭제")
+    args = parser.parse_args(argv)
+
+    index = HashIndex(args.index)
+    try:
+        paths = (os.path.abspath(path) for path in iter_ico_files(args.targets))
+        summary = run_index(paths, index, workers=args.workers)
+        if args.prune:
+            print(f"색인에서 삭제: {index.prune_missing()}개 파일")
+        exact, pixel = index.exact_duplicates(), index.pixel_duplicates()
+    finally:
+        index.close()
+
+    print(f"색인 갱신: {summary['files']}개 파일 (변경 없음 {summary['unchanged']}, 해시 {summary['hashed']}, "
+          f"실패 {summary['failed']}), 엔트리 {summary['entries']}개 (디코딩 {summary['decoded']}), "
+          f"{summary['elapsed']:.2f}초 ({summary['files_per_sec']:.0f} files/s)")
+    print(format_groups("완전 중복 (바이트 동일)", exact, args.top))
+    print(format_groups("픽셀 중복 (인코딩만 다름)", pixel, args.top))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'exact': exact, 'pixel': pixel}, f, ensure_ascii=False, indent=1)
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
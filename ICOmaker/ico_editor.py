@@ -0,0 +1,175 @@
+import os
+import tempfile
+from ico_parser import ICOFile
+from image_processor import ImageProcessor, ICOWriter, OperationCancelled
+from ico_generator import ICOGenerator
+from instrumentation import instrumentation
+
+
+class EncodedEntry:
+    """
+    편집 중 새로 인코딩한 엔트리 (저장 전이라 파일 오프셋이 없음)
+    fields 는 디렉터리에 쓸 (Planes, BitCount) 로, CUR 엔트리의 핫스팟 (x, y) 을 기록할 때만 지정한다.
+    """
+    __slots__ = ('width', 'height', 'colors', 'bit_count', 'data', 'image', 'fields')
+
+    def __init__(self, image, fmt=None, fields=None):
+        fmt = fmt or ICOWriter.choose_format(image.size[0])
+        self.width, self.height, self.colors, self.bit_count, self.data = ICOWriter.encode_entry(image, fmt)
+        self.image = image  # 미리보기용 (다시 디코딩하지 않음)
+        self.fields = fields
+
+    def decode(self):
+        return self.image.copy()
+
+    def as_dict(self):
+        return {
+            'Width': self.width,
+            'Height': self.height,
+            'Colors': self.colors,
+            'Planes': self.fields[0] if self.fields else 1,
+            'BitCount': self.fields[1] if self.fields else self.bit_count,
+            'Size': len(self.data),
+            'Offset': '(저장 전)',
+        }
+
+
+class ICOEditor:
+    """
+    기존 ICO 파일의 엔트리 추가 / 교체 / 삭제 / 순서 변경
+    손대지 않은 엔트리는 원본 파일 매핑(ICOFile)의 바이트를 디코딩/재인코딩 없이 그대로 복사하고,
+    새로 넣은 엔트리만 인코딩한 뒤 디렉터리를 다시 작성한다.
+    entries 는 ICOEntry (원본) 와 EncodedEntry (새 엔트리) 가 섞인 목록이다.
+    """
+
+    def __init__(self, source):
+        self.ico_file = source if isinstance(source, ICOFile) else ICOFile(source)
+        self.entries = list(self.ico_file.entries)
+        self.modified = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def is_original(self, index):
+        return not isinstance(self.entries[index], EncodedEntry)
+
+    def sizes(self):
+        return [entry.width for entry in self.entries]
+
+    def decode(self, index):
+        return self.entries[index].decode()
+
+    def add(self, image, size, fmt=None, resample=ImageProcessor.DEFAULT_RESAMPLE, hotspot=None):
+        """
+        image 를 size x size 로 축소해 새 엔트리로 추가, 추가된 위치 반환
+        기존 엔트리 순서(작은 크기부터)를 따라 size 보다 큰 첫 엔트리 앞에 넣는다.
+        CUR 이면 hotspot (image 좌표) 을 엔트리 크기로 환산해 기록하고, 없으면 가장 큰 기존 엔트리의 핫스팟을 따른다.
+        """
+        fields = self.scaled_hotspot(image, size, hotspot) if self.ico_file.type == 2 else None
+        entry = EncodedEntry(ImageProcessor.fit_square(image, size, ImageProcessor.resolve_resample(resample)), fmt, fields)
+        index = next((i for i, existing in enumerate(self.entries) if existing.width > size), len(self.entries))
+        self.entries.insert(index, entry)
+        self.modified = True
+        return index
+
+    def scaled_hotspot(self, image, size, hotspot=None):
+        """size x size 로 추가할 CUR 엔트리의 핫스팟 (ICOGenerator.scale_hotspot 과 같은 환산)"""
+        if hotspot is not None:
+            return ICOGenerator.scale_hotspot(hotspot, image.size, size)
+        if not self.entries:
+            return 0, 0
+        index = max(range(len(self.entries)), key=lambda i: self.entries[i].width)
+        reference = self.entries[index]
+        return ICOGenerator.scale_hotspot(self.directory_fields()[index], (reference.width, reference.height), size)
+
+    def replace(self, index, image, fmt=None, resample=ImageProcessor.DEFAULT_RESAMPLE):
+        """index 엔트리를 image 로 교체 (크기는 기존 엔트리와 같게 맞추고, CUR 이면 핫스팟을 유지)"""
+        old = self.entries[index]
+        fields = None
+        if self.ico_file.type == 2:
+            fields = old.fields if isinstance(old, EncodedEntry) else (old.planes, old.bit_count)
+        self.entries[index] = EncodedEntry(ImageProcessor.fit_square(image, old.width, ImageProcessor.resolve_resample(resample)),
+                                           fmt, fields)
+        self.modified = True
+
+    def remove(self, index):
+        if len(self.entries) <= 1:
+            raise ValueError("마지막 엔트리는 삭제할 수 없습니다")
+        del self.entries[index]
+        self.modified = True
+
+    def move(self, index, new_index):
+        """엔트리를 new_index 위치로 이동, 실제로 옮겨진 위치 반환"""
+        new_index = max(0, min(new_index, len(self.entries) - 1))
+        if new_index != index:
+            self.entries.insert(new_index, self.entries.pop(index))
+            self.modified = True
+        return new_index
+
+    def directory_fields(self):
+        """엔트리별 (Planes, BitCount) 디렉터리 값 (원본 엔트리는 CUR 핫스팟도 그대로 유지)"""
+        fields = []
+        for entry in self.entries:
+            if isinstance(entry, EncodedEntry):
+                if entry.fields:
+                    fields.append(entry.fields)
+                else:
+                    fields.append((1, entry.bit_count) if self.ico_file.type == 1 else (0, 0))
+            else:
+                fields.append((entry.planes, entry.bit_count))
+        return fields
+
+    @instrumentation.wrap('edit_save')
+    def save(self, output_path=None, cancel_event=None):
+        """
+        편집 결과 저장 (output_path 가 없으면 원본 파일에 덮어씀)
+        원본 매핑에서 바로 복사하므로 임시 파일에 다 쓴 뒤 매핑을 닫고 교체한다
+        (Windows 에서는 매핑된 파일을 교체할 수 없음).
+        저장 후에는 저장한 파일을 다시 열어 이어서 편집할 수 있다.
+        반환값: (성공 여부, 메시지, 엔트리 메타데이터 목록)
+        """
+        output_path = output_path or self.ico_file.path
+        if not output_path:
+            return False, "ICO 저장 실패: 저장 경로가 없습니다", None
+        copied = sum(1 for i in range(len(self.entries)) if self.is_original(i))
+        in_place = self.ico_file.path is not None and os.path.exists(output_path) and \
+            os.path.samefile(self.ico_file.path, output_path)
+        fd, staging_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix='.tmp')
+        os.close(fd)
+        try:
+            records = ICOWriter.write_stream(
+                staging_path,
+                ((entry.width, entry.height, entry.colors, entry.bit_count, entry.data) for entry in self.entries),
+                len(self.entries), cancel_event, self.ico_file.type, self.directory_fields())
+            if in_place:
+                self.ico_file.close()
+            try:
+                os.replace(staging_path, output_path)
+            except OSError:
+                if in_place:
+                    self.reopen()
+                raise
+        except OperationCancelled:
+            os.remove(staging_path)
+            return False, "ICO 저장 취소됨", None
+        except Exception as e:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+            return False, f"ICO 저장 실패: {str(e)}", None
+        if not in_place:
+            self.ico_file.close()
+        self.ico_file = ICOFile(output_path)
+        self.entries = list(self.ico_file.entries)
+        self.modified = False
+        return True, f"ICO 저장 완료: {len(records)}개 엔트리 (원본 복사 {copied}개, 새 인코딩 {len(records) - copied}개)", records
+
+    def reopen(self):
+        """교체에 실패했을 때 원본을 다시 매핑하고 원본 엔트리들이 새 매핑을 가리키도록 함"""
+        ico_file = ICOFile(self.ico_file.path)
+        for entry in self.entries:
+            if not isinstance(entry, EncodedEntry):
+                entry._file = ico_file
+        self.ico_file = ico_file
+
+    def close(self):
+        self.ico_file.close()
@@ -0,0 +1,173 @@
+import argparse
+import os
+import struct
+import sys
+from PIL import Image
+try:
+    import numpy as np
+except ImportError:  # 없으면 BMP/DIB 엔트리도 Pillow 로 디코딩
+    np = None
+from ico_parser import ICOFile, ICOParseError
+from ico_scanner import ICO_EXTENSIONS
+from bulk_jobs import iter_chunks, iter_target_files, run_bounded
+from image_processor import BITMAPINFOHEADER, ICOWriter
+
+PNG_COMPRESS_LEVEL = 6  # 추출은 속도 우선 (생성 시의 9 보다 낮게)
+
+
+def dib_rows(data, offset, width, height, bits):
+    """offset 부터 4바이트 정렬된 행 height 개를 (height, stride) 배열로 (아래 행부터 저장된 것을 위에서부터로 뒤집음)"""
+    stride = ICOWriter.dib_stride(width, bits)
+    rows = np.frombuffer(data, np.uint8, stride * height, offset).reshape(height, stride)
+    return rows[::-1]
+
+
+def unpack_indices(rows, width, bits):
+    """1/4/8비트 팔레트 행을 (height, width) 인덱스 배열로"""
+    if bits == 8:
+        return rows[:, :width]
+    if bits == 4:
+        return np.stack((rows >> 4, rows & 0x0F), axis=-1).reshape(rows.shape[0], -1)[:, :width]
+    return np.unpackbits(rows, axis=1)[:, :width]
+
+
+def decode_dib(data):
+    """
+    ICO 의 BMP/DIB 엔트리 (XOR 비트맵 + AND 마스크) 를 NumPy 로 RGBA 이미지로 변환
+    32비트는 알파 채널을 쓰되 알파가 전부 0 인 (구형) 아이콘은 AND 마스크로 투명도를 정하고,
+    1/4/8/24비트는 AND 마스크 (1 = 투명) 로 투명도를 정한다. AND 마스크가 잘린 파일은 불투명으로 본다.
+    지원하지 않는 형식 (압축/16비트 등) 이면 None 반환, 헤더나 픽셀 데이터가 잘렸으면 ValueError.
+    """
+    if len(data) < BITMAPINFOHEADER.size:
+        raise ValueError(f"DIB 헤더가 잘렸습니다 ({len(data)} bytes)")
+    header_size, width, double_height, _, bits, compression, _, _, _, colors_used, _ = \
+        BITMAPINFOHEADER.unpack_from(data)
+    height = abs(double_height) // 2
+    if compression != 0 or bits not in (1, 4, 8, 24, 32) or width <= 0 or height <= 0:
+        return None
+    offset = header_size
+    palette = None
+    if bits <= 8:
+        count = colors_used or (1 << bits)
+        palette = np.frombuffer(data, np.uint8, count * 4, offset).reshape(count, 4)[:, 2::-1]  # BGRX -> RGB
+        palette = np.vstack((palette, np.zeros((256 - count, 3), np.uint8))) if count < 256 else palette[:256]
+        offset += count * 4
+    xor = dib_rows(data, offset, width, height, bits)
+    offset += xor.size
+
+    rgba = np.empty((height, width, 4), np.uint8)
+    if bits == 32:
+        pixels = xor.reshape(height, -1, 4)[:, :width]
+        rgba[..., :3] = pixels[..., 2::-1]
+        rgba[..., 3] = pixels[..., 3]
+    elif bits == 24:
+        pixels = xor[:, :width * 3].reshape(height, width, 3)
+        rgba[..., :3] = pixels[..., ::-1]
+        rgba[..., 3] = 255
+    else:
+        rgba[..., :3] = palette[unpack_indices(xor, width, bits)]
+        rgba[..., 3] = 255
+
+    if bits != 32 or not rgba[..., 3].any():
+        mask_stride = ICOWriter.dib_stride(width, 1)
+        if len(data) >= offset + mask_stride * height:
+            transparent = unpack_indices(dib_rows(data, offset, width, height, 1), width, 1).astype(bool)
+            rgba[..., 3] = np.where(transparent, 0, 255)
+        else:
+            rgba[..., 3] = 255
+    return Image.fromarray(rgba, 'RGBA')
+
+
+def decode_entry(entry):
+    """엔트리를 RGBA 이미지로 (DIB 는 NumPy 변환, PNG 와 지원 밖 형식은 Pillow 로)"""
+    image = decode_dib(entry.data) if np is not None and not entry.is_png else None
+    if image is None:
+        image = entry.decode()
+    return image if image.mode == 'RGBA' else image.convert('RGBA')
+
+
+def entry_png(entry):
+    """엔트리를 PNG 바이트로: PNG 엔트리는 디코딩 없이 그대로, DIB 는 decode_entry 로 변환"""
+    if entry.is_png:
+        return bytes(entry.data), 'copied'
+    return ICOWriter.encode_png(decode_entry(entry), compress_level=PNG_COMPRESS_LEVEL), 'converted'
+
+
+def output_stem(path, base_dir, output_dir):
+    """ICO 경로에 대응하는 출력 파일 이름 앞부분 (디렉터리 입력이면 하위 구조 유지)"""
+    relative = os.path.relpath(path, base_dir) if base_dir else os.path.basename(path)
+    return os.path.join(output_dir, os.path.splitext(relative)[0])
+
+
+def extract_file(path, base_dir, output_dir):
+    """
+    ICO 파일 한 개의 엔트리를 <이름>_<순번>_<너비>x<높이>.png 로 저장
+    반환값: (경로, 성공 여부, 메시지, 엔트리 수, 그대로 복사한 수, 변환한 수, 쓴 바이트 수)
+    """
+    copied = converted = written = 0
+    try:
+        stem = output_stem(path, base_dir, output_dir)
+        os.makedirs(os.path.dirname(stem) or '.', exist_ok=True)
+        with ICOFile(path) as ico_file:
+            for entry in ico_file.entries:
+                png, kind = entry_png(entry)
+                with open(f"{stem}_{entry.index + 1}_{entry.width}x{entry.height}.png", 'wb') as f:
+                    f.write(png)
+                written += len(png)
+                if kind == 'copied':
+                    copied += 1
+                else:
+                    converted += 1
+            count = len(ico_file)
+    except (ICOParseError, OSError, ValueError, struct.error) as e:
+        return path, False, str(e), copied + converted, copied, converted, written
+    return path, True, f"{count}개 엔트리", count, copied, converted, written
+
+
+def extract_chunk(items, output_dir):
+    """워커 프로세스 작업 단위 (파일 여러 개를 묶어 프로세스 간 통신 비용을 줄임)"""
+    return [extract_file(path, base_dir, output_dir) for path, base_dir in items]
+
+
+def run_extract(sources, output_dir, workers=None, chunk_size=16, report=print):
+    """
+    워커 풀로 ICO 파일들을 동시에 풀어 PNG 로 저장
+    제출된 묶음 수를 워커 수의 몇 배로 제한해 입력 목록 전체를 메모리에 올리지 않는다.
+    sources 는 (.ico 경로, 기준 디렉터리) 목록 (bulk_jobs.iter_target_files 참고).
+    """
+    summary = {'files': 0, 'failed': 0, 'entries': 0, 'copied': 0, 'converted': 0, 'bytes': 0,
+               'elapsed': 0.0, 'files_per_sec': 0.0, 'bytes_per_sec': 0.0}
+
+    def handle(results):
+        for path, success, message, count, copied, converted, written in results:
+            summary['files'] += 1
+            summary['entries'] += count
+            summary['copied'] += copied
+            summary['converted'] += converted
+            summary['bytes'] += written
+            if not success:
+                summary['failed'] += 1
+                report(f"[FAIL] {path} {message}")
+
+    jobs = ((chunk, output_dir) for chunk in iter_chunks(sources, chunk_size))
+    return run_bounded(extract_chunk, jobs, handle, summary,
+                       {'files_per_sec': 'files', 'bytes_per_sec': 'bytes'}, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ICO 파일들의 엔트리를 PNG 로 일괄 추출 (디스플레이 불필요)")
+    parser.add_argument("targets", nargs='+', help="추출할 .ico 파일 또는 디렉터리")
+    parser.add_argument("-o", "--output", default="png_output", help="PNG 출력 디렉터리")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    args = parser.parse_args(argv)
+
+    summary = run_extract(iter_target_files(args.targets, ICO_EXTENSIONS), args.output, workers=args.workers)
+    print(f"추출 완료: {summary['files']}개 파일 (실패 {summary['failed']}), 엔트리 {summary['entries']}개 "
+          f"(PNG 그대로 {summary['copied']}, BMP 변환 {summary['converted']}), "
+          f"{summary['bytes'] / 1024 / 1024:.1f}MB 기록, {summary['elapsed']:.2f}초 "
+          f"({summary['files_per_sec']:.0f} files/s, {summary['bytes_per_sec'] / 1024 / 1024:.1f}MB/s)")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,266 @@
 from PIL import Image
 import os
-import io
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from image_processor import ImageProcessor, ICOWriter, ICOOptimizer, ICOPalettizer, OperationCancelled
+from ico_parser import read_directory
+from instrumentation import instrumentation
 
 class ICOGenerator:
     RESOLUTIONS = [256, 128, 64, 48, 40, 32, 24, 20, 16]
+    # 출력 대상: Windows ICO, Windows 커서(CUR), macOS ICNS, 웹 favicon PNG 묶음
+    TARGETS = ('ico', 'cur', 'icns', 'favicon')
+    # targets 를 지정하지 않았을 때의 출력 대상 (CUR 은 명시적으로 고를 때만 만든다)
+    DEFAULT_TARGETS = ('ico', 'icns', 'favicon')
+    # ICNS 에 넣는 크기 (원본보다 큰 크기는 확대하지 않고 빠짐)
+    ICNS_SIZES = [1024, 512, 256, 128, 64, 32]
+    # ICNS PNG 엔트리 타입 -> 크기 (@2x 타입은 같은 PNG 를 공유, Pillow ICNS 플러그인과 같은 구성)
+    ICNS_TYPES = {b'ic07': 128, b'ic08': 256, b'ic09': 512, b'ic10': 1024,
+                  b'ic11': 32, b'ic12': 64, b'ic13': 256, b'ic14': 512}
+    ICNS_BLOCK = struct.Struct('>4sI')  # 블록 타입, 헤더 포함 블록 길이
+    FAVICON_FILES = {
+        16: 'favicon-16x16.png',
+        32: 'favicon-32x32.png',
+        180: 'apple-touch-icon.png',
+        192: 'android-chrome-192x192.png',
+        512: 'android-chrome-512x512.png',
+    }
     
     @staticmethod
-    def create_ico(image, selected_sizes, output_path):
+    @instrumentation.wrap('create_ico')
+    def create_ico(image, selected_sizes, output_path, resample=ImageProcessor.DEFAULT_RESAMPLE,
+                   progress_callback=None, cancel_event=None, formats=None, workers=None,
+                   optimize=False, time_budget=ICOOptimizer.DEFAULT_TIME_BUDGET, report_callback=None, cache=None,
+                   palettize=False, min_psnr=ICOPalettizer.DEFAULT_MIN_PSNR, engine='pillow', sharpen=False,
+                   hotspot=None):
         """
         선택된 해상도로 ICO 파일 생성
+        각 해상도는 원본이 아닌 해상도 피라미드의 중간 단계에서 축소한다.
+        progress_callback / cancel_event 는 ImageProcessor.build_pyramid 로 전달되며,
+        취소되면 파일을 쓰지 않는다.
+        엔트리는 ICOWriter 로 병렬 인코딩한다 (formats: {size: 'png'|'bmp'}).
+        optimize=True 이면 ICOOptimizer 로 엔트리마다 가장 작은 무손실 인코딩을 고르고,
+        엔트리별 절감 보고서를 report_callback 으로 넘긴다.
+        palettize=True 이면 16~32px 엔트리를 ICOPalettizer 로 8/4비트 팔레트 BMP 로 바꿔 보고,
+        PSNR 이 min_psnr 이상이고 더 작을 때만 교체한다 (손실 압축).
+        engine='numpy' 이면 ImageProcessor.build_pyramid_vectorized 로 축소하며, sharpen 으로
+        작은 해상도 선명화를 켤 수 있다 (True 또는 {size: 강도}).
+        hotspot=(x, y) 를 주면 ICO 대신 CUR(Type 2) 로 저장하며, image 좌표 기준 핫스팟을 엔트리 크기마다 환산한다.
+        cache(ICOCache) 가 주어지면 같은 픽셀/해상도/설정의 결과가 있을 때 인코딩 없이 바로 반환한다.
+        파일 전체를 메모리에 만들지 않고 엔트리를 파일로 바로 스트리밍하며,
+        성공 시 세 번째 반환값은 ICO 바이트가 아닌 엔트리 메타데이터 목록이다.
         """
+        kind = "CUR" if hotspot is not None else "ICO"
         try:
-            sizes = [(size, size) for size in selected_sizes if size <= image.size[0]] # 유효한 사이즈만 필터링
-            
-            # 1. 메모리 내에서 ICO 데이터 생성
-            ico_buffer = io.BytesIO()
-            image.save(ico_buffer, format='ICO', sizes=sizes)
-            ico_data = ico_buffer.getvalue()
-            
-            # 2. 파일로 저장
-            with open(output_path, 'wb') as f:
-                f.write(ico_data)
-            
-            return True, f"ICO 생성 완료: {len(sizes)}개 해상도", ico_data
+            valid_sizes = ICOGenerator.validate_resolutions(image.size, selected_sizes) # 유효한 사이즈만 필터링
+            if not valid_sizes:
+                return False, f"{kind} 생성 실패: 유효한 해상도 없음", None
+
+            cache_key = None
+            if cache is not None:
+                settings = {'resample': resample, 'formats': formats, 'optimize': optimize,
+                            'palettize': palettize, 'min_psnr': min_psnr if palettize else None,
+                            'engine': engine, 'sharpen': sharpen if engine == 'numpy' else None,
+                            'hotspot': list(hotspot) if hotspot is not None else None}
+                cache_key = cache.make_key(image, valid_sizes, settings)
+                if cache.fetch(cache_key, output_path):
+                    entries = read_directory(output_path)
+                    return True, f"{kind} 생성 완료: {len(entries)}개 해상도 (캐시)", entries
+
+            pyramid = ICOGenerator.build_frames(image, valid_sizes, resample, engine, sharpen, progress_callback, cancel_event)
+            entries = ICOGenerator.write_ico(pyramid, valid_sizes, output_path, cancel_event, formats, workers,
+                                             optimize, time_budget, report_callback, palettize, min_psnr,
+                                             hotspot, image.size)
+
+            if cache_key is not None:
+                cache.store(cache_key, output_path)
+
+            return True, f"{kind} 생성 완료: {len(entries)}개 해상도", entries
+        except OperationCancelled:
+            return False, f"{kind} 생성 취소됨", None
+        except Exception as e:
+            return False, f"{kind} 생성 실패: {str(e)}", None
+
+    @staticmethod
+    @instrumentation.wrap('create_icons')
+    def create_icons(image, selected_sizes, output_path, targets=DEFAULT_TARGETS, resample=ImageProcessor.DEFAULT_RESAMPLE,
+                     progress_callback=None, cancel_event=None, formats=None, workers=None,
+                     optimize=False, time_budget=ICOOptimizer.DEFAULT_TIME_BUDGET, report_callback=None,
+                     palettize=False, min_psnr=ICOPalettizer.DEFAULT_MIN_PSNR, engine='pillow', sharpen=False,
+                     hotspot=(0, 0)):
+        """
+        여러 출력 대상(ICO / CUR / ICNS / favicon PNG)을 한 번에 생성
+        모든 대상에 필요한 해상도를 합쳐 피라미드를 한 번만 만들고,
+        그 결과 프레임을 대상별 writer 에 나눠 스레드 풀에서 동시에 저장한다.
+        output_path 는 ICO 경로이며, CUR / ICNS / favicon 폴더는 같은 위치에 이름만 바꿔 만든다 (output_paths 참고).
+        CUR 은 ICO 와 같은 해상도로 만들고 hotspot 은 image 좌표 기준이다.
+        반환값: (성공 여부, 메시지, {대상: 결과}) - ico/cur 는 엔트리 메타데이터, icns 는 경로, favicon 은 경로 목록
+        """
+        try:
+            targets = [t for t in ICOGenerator.TARGETS if t in targets]
+            if not targets:
+                return False, "아이콘 생성 실패: 출력 대상 없음", None
+            has_entries = 'ico' in targets or 'cur' in targets
+            ico_sizes = ICOGenerator.validate_resolutions(image.size, selected_sizes) if has_entries else []
+            if has_entries and not ico_sizes:
+                return False, "ICO 생성 실패: 유효한 해상도 없음", None
+
+            pyramid_sizes = set(ico_sizes)
+            for target in targets:
+                pyramid_sizes.update(ICOGenerator.validate_resolutions(image.size, ICOGenerator.target_sizes(target)))
+            if not pyramid_sizes:
+                return False, "아이콘 생성 실패: 유효한 해상도 없음", None
+            pyramid = ICOGenerator.build_frames(image, pyramid_sizes, resample, engine, sharpen, progress_callback, cancel_event)
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+
+            paths = ICOGenerator.output_paths(output_path)
+            writers = {
+                'ico': lambda: ICOGenerator.write_ico(pyramid, ico_sizes, paths['ico'], cancel_event, formats, workers,
+                                                      optimize, time_budget, report_callback, palettize, min_psnr),
+                'cur': lambda: ICOGenerator.write_ico(pyramid, ico_sizes, paths['cur'], cancel_event, formats, workers,
+                                                      optimize, time_budget, None, palettize, min_psnr,
+                                                      hotspot, image.size),
+                'icns': lambda: ICOGenerator.write_icns(pyramid, paths['icns']),
+                'favicon': lambda: ICOGenerator.write_favicons(pyramid, paths['favicon']),
+            }
+            # 대상별 writer 는 서로 독립적이므로 동시에 실행 (각 writer 는 프레임을 읽기만 함)
+            with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+                futures = {target: pool.submit(writers[target]) for target in targets}
+                outputs = {target: future.result() for target, future in futures.items()}
+
+            parts = []
+            if 'ico' in outputs:
+                parts.append(f"ICO {len(outputs['ico'])}개 해상도")
+            if 'cur' in outputs:
+                parts.append(f"CUR {len(outputs['cur'])}개 해상도")
+            if 'icns' in outputs:
+                parts.append("ICNS")
+            if 'favicon' in outputs:
+                parts.append(f"favicon {len(outputs['favicon'])}개")
+            return True, f"아이콘 생성 완료: {', '.join(parts)}", outputs
+        except OperationCancelled:
+            return False, "아이콘 생성 취소됨", None
         except Exception as e:
-            return False, f"ICO 생성 실패: {str(e)}", None
+            return False, f"아이콘 생성 실패: {str(e)}", None
+
+    @staticmethod
+    def build_frames(image, sizes, resample=ImageProcessor.DEFAULT_RESAMPLE, engine='pillow', sharpen=False,
+                     progress_callback=None, cancel_event=None):
+        """축소 엔진 선택 ('pillow': build_pyramid, 'numpy': build_pyramid_vectorized), {size: RGBA} 반환"""
+        if engine == 'numpy':
+            return ImageProcessor.build_pyramid_vectorized(image, sizes, resample, sharpen, progress_callback, cancel_event)
+        if engine != 'pillow':
+            raise ValueError(f"지원하지 않는 축소 엔진: {engine}")
+        return ImageProcessor.build_pyramid(image, sizes, resample, progress_callback, cancel_event)
+
+    @staticmethod
+    def target_sizes(target, selected_sizes=()):
+        """출력 대상에 필요한 해상도 목록 (ico / cur 는 선택된 해상도 그대로)"""
+        if target in ('ico', 'cur'):
+            return list(selected_sizes)
+        if target == 'icns':
+            return list(ICOGenerator.ICNS_SIZES)
+        if target == 'favicon':
+            return sorted(ICOGenerator.FAVICON_FILES, reverse=True)
+        raise ValueError(f"지원하지 않는 출력 대상: {target}")
+
+    @staticmethod
+    def output_paths(output_path):
+        """ICO 경로 기준 대상별 출력 경로 (foo.ico -> foo.cur, foo.icns, foo_favicon/)"""
+        stem = os.path.splitext(output_path)[0]
+        return {'ico': output_path, 'cur': stem + '.cur', 'icns': stem + '.icns', 'favicon': stem + '_favicon'}
+
+    @staticmethod
+    def scale_hotspot(hotspot, source_size, size):
+        """원본 좌표 핫스팟을 size x size 엔트리 좌표로 환산 (fit_square 와 같은 배율/가운데 정렬)"""
+        width, height = source_size
+        scale = size / max(width, height)
+        left = (size - max(1, round(width * scale))) // 2
+        top = (size - max(1, round(height * scale))) // 2
+        x = min(size - 1, max(0, left + int(hotspot[0] * scale)))
+        y = min(size - 1, max(0, top + int(hotspot[1] * scale)))
+        return x, y
+
+    @staticmethod
+    def write_ico(pyramid, sizes, output_path, cancel_event=None, formats=None, workers=None,
+                  optimize=False, time_budget=ICOOptimizer.DEFAULT_TIME_BUDGET, report_callback=None,
+                  palettize=False, min_psnr=ICOPalettizer.DEFAULT_MIN_PSNR, hotspot=None, source_size=None):
+        """
+        피라미드에서 sizes 프레임만 골라 ICO 로 스트리밍 저장, 엔트리 메타데이터 반환
+        hotspot 이 있으면 CUR 로 저장 (디렉터리의 Planes/BitCount 자리에 엔트리별 핫스팟 x/y 기록)
+        """
+        frames = [pyramid[size] for size in sorted(set(sizes))]
+
+        # 1. 엔트리 인코딩 (기본: 병렬 인코딩 결과를 순서대로 하나씩 받음)
+        report = None
+        if optimize:
+            encoded, report = ICOOptimizer.optimize_entries(frames, formats, time_budget, workers)
+        else:
+            encoded = ICOWriter.iter_encoded(frames, formats, workers=workers)
+        if palettize:
+            # 작은 해상도만 팔레트 BMP 후보로 교체 (품질 기준을 넘고 더 작을 때만)
+            encoded, report = ICOPalettizer.apply(frames, encoded, min_psnr, report, workers)
+        if report is not None and report_callback:
+            report_callback(report)
+
+        # 2. 파일로 스트리밍 저장 (디렉터리 오프셋은 마지막에 기록)
+        if hotspot is None:
+            return ICOWriter.write_stream(output_path, encoded, len(frames), cancel_event)
+        source_size = source_size or frames[-1].size
+        fields = [ICOGenerator.scale_hotspot(hotspot, source_size, frame.size[0]) for frame in frames]
+        return ICOWriter.write_stream(output_path, encoded, len(frames), cancel_event, 2, fields)
+
+    @staticmethod
+    @instrumentation.wrap('write_icns')
+    def write_icns(pyramid, output_path):
+        """
+        피라미드 프레임으로 ICNS 저장 (같은 폴더 임시 파일에 쓴 뒤 교체)
+        Pillow ICNS writer 는 없는 크기를 첫 프레임에서 확대해 채우므로, 컨테이너를 직접 써서
+        피라미드에 있는 크기 (원본 이하) 의 엔트리만 넣는다.
+        """
+        pngs = {size: ICOWriter.encode_png(pyramid[size].copy())
+                for size in set(ICOGenerator.ICNS_TYPES.values()) if size in pyramid}
+        if not pngs:
+            raise ValueError(f"ICNS 생성 실패: 원본이 {min(ICOGenerator.ICNS_SIZES)}px 보다 작습니다")
+        blocks = [(type_, pngs[size]) for type_, size in ICOGenerator.ICNS_TYPES.items() if size in pngs]
+        block = ICOGenerator.ICNS_BLOCK
+        toc = b''.join(block.pack(type_, block.size + len(png)) for type_, png in blocks)
+        parts = [block.pack(b'TOC ', block.size + len(toc)), toc]
+        for type_, png in blocks:
+            parts.append(block.pack(type_, block.size + len(png)))
+            parts.append(png)
+        body = b''.join(parts)
+        ICOGenerator.replace_file(output_path, block.pack(b'icns', block.size + len(body)) + body)
+        return output_path
+
+    @staticmethod
+    @instrumentation.wrap('write_favicon')
+    def write_favicons(pyramid, output_dir):
+        """favicon / apple-touch / android PNG 를 output_dir 에 저장, 저장한 경로 목록 반환"""
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for size, name in sorted(ICOGenerator.FAVICON_FILES.items()):
+            if size not in pyramid:
+                continue  # 원본보다 큰 크기는 만들지 않음
+            path = os.path.join(output_dir, name)
+            ICOGenerator.replace_file(path, ICOWriter.encode_png(pyramid[size].copy()))
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def replace_file(path, data):
+        """같은 폴더의 임시 파일에 쓴 뒤 교체 (실패해도 기존 파일은 그대로)"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     @staticmethod
     def validate_resolutions(image_size, selected_sizes):
@@ -0,0 +1,162 @@
+import io
+import mmap
+import struct
+from PIL import Image
+
+ICO_HEADER = struct.Struct('<HHH')            # Reserved, Type, Count
+ICO_DIR_ENTRY = struct.Struct('<BBBBHHII')    # Width, Height, Colors, Reserved, Planes, BitCount, Size, Offset
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+ICO_TYPES = {1: 'ICO', 2: 'CUR'}
+
+
+class ICOParseError(ValueError):
+    """ICO 헤더/디렉터리가 손상되었거나 파일 범위를 벗어날 때 발생"""
+
+
+class ICOEntry:
+    """ICO 디렉터리 레코드 1개 (픽셀 데이터는 decode() 호출 시에만 해석)"""
+    __slots__ = ('index', 'width', 'height', 'colors', 'planes', 'bit_count', 'size', 'offset', '_file')
+
+    def __init__(self, ico_file, index, width, height, colors, planes, bit_count, size, offset):
+        self._file = ico_file
+        self.index = index
+        self.width = width if width != 0 else 256
+        self.height = height if height != 0 else 256
+        self.colors = colors
+        self.planes = planes
+        self.bit_count = bit_count
+        self.size = size
+        self.offset = offset
+
+    @property
+    def data(self):
+        """엔트리 이미지 데이터 (복사 없는 memoryview)"""
+        return self._file.view[self.offset:self.offset + self.size]
+
+    @property
+    def is_png(self):
+        return self.data[:8] == PNG_SIGNATURE
+
+    def decode(self):
+        """엔트리 픽셀 데이터를 PIL 이미지로 디코딩 (PNG 또는 BMP/DIB + AND 마스크)"""
+        data = self.data
+        if data[:8] == PNG_SIGNATURE:
+            image = Image.open(io.BytesIO(data))
+        else:
+            # DIB 는 단독으로 열 수 없으므로 엔트리 하나짜리 ICO 로 감싸 Pillow ICO 플러그인에 맡긴다
+            planes, bit_count = self.planes, self.bit_count
+            if self._file.type == 2 and len(data) >= 16:
+                # CUR 의 Planes/BitCount 는 핫스팟이므로 DIB 헤더의 비트 수를 씀 (32비트 알파 유지)
+                planes, bit_count = 1, struct.unpack_from('<H', data, 14)[0]
+            header = ICO_HEADER.pack(0, 1, 1)
+            record = ICO_DIR_ENTRY.pack(self.width % 256, self.height % 256, self.colors, 0,
+                                        planes, bit_count, self.size,
+                                        ICO_HEADER.size + ICO_DIR_ENTRY.size)
+            image = Image.open(io.BytesIO(header + record + data))
+        image.load()
+        return image
+
+    def as_dict(self):
+        """구조 트리 표시용 필드"""
+        return {
+            'Width': self.width,
+            'Height': self.height,
+            'Colors': self.colors,
+            'Planes': self.planes,
+            'BitCount': self.bit_count,
+            'Size': self.size,
+            'Offset': self.offset,
+        }
+
+
+class ICOFile:
+    """
+    mmap 기반 ICO 파서
+    헤더와 디렉터리만 읽고, 각 엔트리는 파일 매핑에 대한 memoryview 로 노출한다.
+    source 는 파일 경로 또는 bytes 류 객체.
+    """
+
+    def __init__(self, source):
+        self._mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.path = None
+            self.view = memoryview(source)
+        else:
+            self.path = source
+            with open(source, 'rb') as f:
+                try:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    raise ICOParseError("빈 파일입니다")
+            self.view = memoryview(self._mmap)
+        try:
+            self.reserved, self.type, self.count, self.entries = self._parse()
+        except ICOParseError:
+            self.close()
+            raise
+
+    def _parse(self):
+        length = len(self.view)
+        if length < ICO_HEADER.size:
+            raise ICOParseError(f"헤더가 잘렸습니다 ({length} bytes)")
+        reserved, type_, count = ICO_HEADER.unpack_from(self.view, 0)
+        if reserved != 0 or type_ not in ICO_TYPES:
+            raise ICOParseError(f"ICO 파일이 아닙니다 (Reserved={reserved}, Type={type_})")
+
+        directory_end = ICO_HEADER.size + count * ICO_DIR_ENTRY.size
+        if directory_end > length:
+            raise ICOParseError(f"디렉터리가 파일 길이를 넘습니다 (Count={count}, 파일 {length} bytes)")
+
+        entries = []
+        for i in range(count):
+            width, height, colors, _, planes, bit_count, size, offset = \
+                ICO_DIR_ENTRY.unpack_from(self.view, ICO_HEADER.size + i * ICO_DIR_ENTRY.size)
+            if size == 0:
+                raise ICOParseError(f"Entry {i + 1}: 이미지 크기가 0입니다")
+            if offset < directory_end or offset + size > length:
+                raise ICOParseError(f"Entry {i + 1}: 데이터 범위 {offset}~{offset + size} 가 파일({length} bytes)을 벗어납니다")
+            entries.append(ICOEntry(self, i, width, height, colors, planes, bit_count, size, offset))
+        return reserved, type_, count, entries
+
+    def decode(self, index):
+        return self.entries[index].decode()
+
+    def close(self):
+        self.view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                pass  # 외부에서 잡고 있는 엔트리 memoryview 가 있으면 GC 시점에 해제된다
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def read_directory(path):
+    """
+    헤더와 디렉터리 레코드만 읽어 엔트리 메타데이터 목록 반환 (이미지 데이터는 읽지 않음)
+    반환값: ICOEntry.as_dict 와 같은 키의 dict 목록
+    """
+    with open(path, 'rb') as f:
+        header = f.read(ICO_HEADER.size)
+        if len(header) < ICO_HEADER.size:
+            raise ICOParseError(f"헤더가 잘렸습니다 ({len(header)} bytes)")
+        reserved, type_, count = ICO_HEADER.unpack(header)
+        if reserved != 0 or type_ not in ICO_TYPES:
+            raise ICOParseError(f"ICO 파일이 아닙니다 (Reserved={reserved}, Type={type_})")
+        directory = f.read(count * ICO_DIR_ENTRY.size)
+    if len(directory) < count * ICO_DIR_ENTRY.size:
+        raise ICOParseError(f"디렉터리가 잘렸습니다 (Count={count})")
+    entries = []
+    for width, height, colors, _, planes, bit_count, size, offset in ICO_DIR_ENTRY.iter_unpack(directory):
+        entries.append({'Width': width or 256, 'Height': height or 256, 'Colors': colors, 'Planes': planes,
+                        'BitCount': bit_count, 'Size': size, 'Offset': offset})
+    return entries
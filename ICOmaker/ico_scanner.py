@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import struct
+import sys
+from ico_parser import ICO_HEADER, ICO_DIR_ENTRY, ICO_TYPES, PNG_SIGNATURE
+from bulk_jobs import iter_chunks, iter_target_files, run_bounded
+
+# 엔트리 앞부분만 읽어 형식을 확인 (PNG 시그니처 + IHDR 너비/높이, 또는 BITMAPINFOHEADER 앞 16바이트)
+PEEK_SIZE = 24
+PNG_IHDR_SIZE = struct.Struct('>II')   # PNG 16~24 바이트: 너비, 높이
+DIB_HEAD = struct.Struct('<IiiHH')     # biSize, biWidth, biHeight, biPlanes, biBitCount
+DIB_HEADER_SIZES = (40, 52, 56, 108, 124)
+DEFAULT_EXPECTED_SIZES = (16, 32, 48, 256)
+ICO_EXTENSIONS = ('.ico',)
+
+
+def issue(code, message, entry=None):
+    result = {'code': code, 'message': message}
+    if entry is not None:
+        result['entry'] = entry
+    return result
+
+
+def check_entry_format(index, record, peek, type_=1):
+    """
+    엔트리 앞부분과 디렉터리 레코드가 일치하는지 확인 (PNG/BMP 불일치 검출)
+    CUR (type_=2) 은 BitCount 자리에 핫스팟 y 가 들어 있으므로 비트 수는 비교하지 않는다.
+    """
+    width, height, bit_count = record['width'], record['height'], record['bit_count']
+    if peek[:8] == PNG_SIGNATURE:
+        if len(peek) < PEEK_SIZE:
+            return [issue('truncated_png', "PNG 헤더가 잘렸습니다", index)]
+        png_width, png_height = PNG_IHDR_SIZE.unpack_from(peek, 16)
+        if (png_width, png_height) != (width, height):
+            return [issue('png_size_mismatch',
+                          f"디렉터리 {width}x{height} 와 PNG {png_width}x{png_height} 가 다릅니다", index)]
+        return []
+    if len(peek) < DIB_HEAD.size:
+        return [issue('unknown_format', "PNG 도 BMP 도 아닌 데이터입니다", index)]
+    header_size, dib_width, dib_height, _, dib_bits = DIB_HEAD.unpack_from(peek)
+    if header_size not in DIB_HEADER_SIZES:
+        return [issue('unknown_format', f"PNG 도 BMP 도 아닌 데이터입니다 (헤더 크기 {header_size})", index)]
+    issues = []
+    if (dib_width, dib_height) != (width, height * 2):
+        issues.append(issue('bmp_size_mismatch',
+                            f"디렉터리 {width}x{height} 와 DIB {dib_width}x{dib_height}(XOR+AND) 가 다릅니다", index))
+    if type_ == 1 and bit_count and dib_bits != bit_count:
+        issues.append(issue('bmp_bitcount_mismatch', f"디렉터리 BitCount={bit_count}, DIB={dib_bits}", index))
+    return issues
+
+
+def scan_file(path, expected_sizes=DEFAULT_EXPECTED_SIZES):
+    """
+    ICO 파일 한 개 검사
+    헤더 6바이트, 디렉터리 16바이트 x Count, 엔트리마다 앞부분 PEEK_SIZE 바이트만 읽는다.
+    """
+    result = {'path': path, 'ok': False, 'count': 0, 'sizes': [], 'issues': []}
+    issues = result['issues']
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.read(ICO_HEADER.size)
+            if len(header) < ICO_HEADER.size:
+                issues.append(issue('truncated_header', f"헤더가 잘렸습니다 ({len(header)} bytes)"))
+                return result
+            reserved, type_, count = ICO_HEADER.unpack(header)
+            if reserved != 0 or type_ not in ICO_TYPES:
+                issues.append(issue('bad_header', f"ICO 파일이 아닙니다 (Reserved={reserved}, Type={type_})"))
+                return result
+            result['type'] = ICO_TYPES[type_]
+            result['count'] = count
+            if count == 0:
+                issues.append(issue('empty', "엔트리가 없습니다"))
+
+            directory = f.read(count * ICO_DIR_ENTRY.size)
+            if len(directory) < count * ICO_DIR_ENTRY.size:
+                issues.append(issue('truncated_directory', f"디렉터리가 잘렸습니다 (Count={count})"))
+                return result
+            directory_end = ICO_HEADER.size + count * ICO_DIR_ENTRY.size
+
+            records = []
+            for index, (width, height, colors, _, planes, bit_count, size, offset) in \
+                    enumerate(ICO_DIR_ENTRY.iter_unpack(directory)):
+                record = {'width': width or 256, 'height': height or 256, 'bit_count': bit_count,
+                          'size': size, 'offset': offset}
+                records.append(record)
+                if size == 0:
+                    issues.append(issue('zero_size', "이미지 크기가 0입니다", index))
+                    continue
+                if offset < directory_end or offset + size > file_size:
+                    issues.append(issue('bad_offset',
+                                        f"데이터 범위 {offset}~{offset + size} 가 유효 범위({directory_end}~{file_size})를 벗어납니다",
+                                        index))
+                    continue
+                f.seek(offset)
+                issues.extend(check_entry_format(index, record, f.read(min(PEEK_SIZE, size)), type_))
+    except OSError as e:
+        issues.append(issue('io_error', str(e)))
+        return result
+
+    # 엔트리끼리 데이터 영역이 겹치는지 (오프셋 순 정렬 후 앞선 영역 중 가장 멀리 끝나는 것과 비교)
+    spans = sorted((r['offset'], r['offset'] + r['size'], i) for i, r in enumerate(records) if r['size'])
+    furthest_end, furthest_index = 0, None
+    for start, end, index in spans:
+        if furthest_index is not None and start < furthest_end:
+            issues.append(issue('overlap', f"Entry {furthest_index + 1} 과 데이터 영역이 겹칩니다", index))
+        if end > furthest_end:
+            furthest_end, furthest_index = end, index
+
+    result['sizes'] = sorted({r['width'] for r in records if r['width'] == r['height']}, reverse=True)
+    missing = [s for s in expected_sizes if s not in result['sizes']]
+    if missing and records:
+        issues.append(issue('missing_sizes', f"필수 해상도 없음: {', '.join(map(str, missing))}"))
+    result['ok'] = not issues
+    return result
+
+
+def scan_chunk(paths, expected_sizes):
+    """워커 프로세스 작업 단위 (파일 여러 개를 묶어 프로세스 간 통신 비용을 줄임)"""
+    return [scan_file(path, expected_sizes) for path in paths]
+
+
+def iter_ico_files(targets):
+    """파일/디렉터리 목록에서 .ico 경로를 하나씩 생성 (디렉터리는 하위까지 탐색)"""
+    return (path for path, _ in iter_target_files(targets, ICO_EXTENSIONS))
+
+
+def run_scan(paths, out, expected_sizes=DEFAULT_EXPECTED_SIZES, workers=None, chunk_size=64):
+    """
+    워커 풀로 검사하고 결과를 JSON Lines 로 out 에 기록
+    제출된 묶음 수를 워커 수의 몇 배로 제한해 경로 목록 전체를 메모리에 올리지 않는다.
+    """
+    summary = {'files': 0, 'bad_files': 0, 'issues': 0, 'elapsed': 0.0, 'files_per_sec': 0.0}
+
+    def handle(results):
+        for result in results:
+            summary['files'] += 1
+            summary['issues'] += len(result['issues'])
+            if not result['ok']:
+                summary['bad_files'] += 1
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+    jobs = ((chunk, expected_sizes) for chunk in iter_chunks(paths, chunk_size))
+    return run_bounded(scan_chunk, jobs, handle, summary, {'files_per_sec': 'files'}, workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ICO 파일 일괄 검사 (헤더/디렉터리만 읽음), 결과는 JSON Lines")
+    parser.add_argument("targets", nargs='+', help="검사할 .ico 파일 또는 디렉터리")
+    parser.add_argument("-o", "--output", default=None, help="JSON Lines 출력 파일 (기본: 표준 출력)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--expect", default=','.join(map(str, DEFAULT_EXPECTED_SIZES)),
+                        help="반드시 있어야 하는 해상도 (쉼표 구분, 빈 값이면 검사 안 함)")
+    args = parser.parse_args(argv)
+
+    expected_sizes = tuple(int(s) for s in args.expect.split(',') if s.strip())
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        summary = run_scan(iter_ico_files(args.targets), out, expected_sizes, workers=args.workers)
+    finally:
+        if args.output:
+            out.close()
+    print(f"검사 완료: {summary['files']}개 파일, 문제 파일 {summary['bad_files']}개 (문제 {summary['issues']}건), "
+          f"{summary['elapsed']:.2f}초 ({summary['files_per_sec']:.0f} files/s)", file=sys.stderr)
+    return 0 if summary['bad_files'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
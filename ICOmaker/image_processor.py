@@ -0,0 +1,937 @@
+import io
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
+from PIL import Image, ImageFile
+try:
+    import numpy as np
+except ImportError:  # 벡터 연산 경로 (ICOPalettizer 등) 에서만 필요
+    np = None
+from ico_parser import ICO_HEADER, ICO_DIR_ENTRY, ICOFile
+from instrumentation import instrumentation
+
+BITMAPINFOHEADER = struct.Struct('<IiiHHIIiiII')
+
+
+class OperationCancelled(Exception):
+    """사용자가 작업을 취소했을 때 발생"""
+
+
+class ImageProcessor:
+    RESAMPLE_FILTERS = {
+        'nearest': Image.Resampling.NEAREST,
+        'box': Image.Resampling.BOX,
+        'bilinear': Image.Resampling.BILINEAR,
+        'hamming': Image.Resampling.HAMMING,
+        'bicubic': Image.Resampling.BICUBIC,
+        'lanczos': Image.Resampling.LANCZOS,
+    }
+    DEFAULT_RESAMPLE = 'lanczos'
+    # 마지막 필터 축소 전에 남겨둘 최소 배율 (이보다 크면 2배씩 box 축소로 중간 단계 생성)
+    PYRAMID_HEADROOM = 2
+    REDUCE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'RGBa', 'I', 'F')
+    ENGINES = ('pillow', 'numpy')
+    # 원본 디코딩 메모리 한도 기본값 (넘으면 띠 단위 디코딩, 지원하지 않는 형식은 오류)
+    DEFAULT_MEMORY_LIMIT = 512 * 1024 * 1024
+    # NumPy 경로 필터 커널의 지지 반경 (축소 배율만큼 넓어짐, nearest 는 box 로 처리)
+    KERNEL_SUPPORT = {'nearest': 0.5, 'box': 0.5, 'bilinear': 1.0, 'hamming': 1.0, 'bicubic': 2.0, 'lanczos': 3.0}
+    # sharpen=True 일 때 해상도별 언샤프 마스크 강도 (큰 해상도는 선명화하지 않음)
+    SHARPEN_AMOUNTS = {16: 0.6, 20: 0.5, 24: 0.45, 32: 0.35, 40: 0.25, 48: 0.2}
+
+    @staticmethod
+    def image_bytes(image):
+        """Pillow 내부 픽셀 버퍼 크기 추정 (다채널 모드는 픽셀당 4바이트로 저장됨)"""
+        width, height = image.size
+        return width * height * (1 if image.mode in ('1', 'L', 'P') else 4)
+
+    @staticmethod
+    def open_unbounded(path):
+        """
+        Pillow 의 MAX_IMAGE_PIXELS (압축 폭탄) 검사 없이 이미지 열기 (헤더만 읽음)
+        초대형 원본은 memory_limit 로 디코딩 메모리를 따로 제한하므로 픽셀 수 검사는 건너뛴다.
+        전역 MAX_IMAGE_PIXELS 를 바꾸면 다른 스레드의 Image.open 도 검사 없이 열리므로,
+        Image.open 과 같은 순서로 형식 플러그인을 직접 골라 연다 (검사는 Image.open 안에서만 함).
+        """
+        fp = open(path, 'rb')
+        try:
+            prefix = fp.read(16)
+            for loader in (Image.preinit, Image.init):
+                loader()
+                for format_id in list(Image.ID):
+                    factory, accept = Image.OPEN[format_id]
+                    result = not accept or accept(prefix)
+                    if not result or isinstance(result, str):
+                        continue
+                    fp.seek(0)
+                    try:
+                        image = factory(fp, path)
+                    except (SyntaxError, IndexError, TypeError, struct.error):
+                        continue
+                    image._exclusive_fp = True  # image.close() 가 파일도 닫도록 (Image.open 과 동일)
+                    return image
+        except BaseException:
+            fp.close()
+            raise
+        fp.close()
+        raise Image.UnidentifiedImageError(f"cannot identify image file {path!r}")
+
+    @staticmethod
+    @instrumentation.wrap('decode')
+    def load_reduced(path, min_size, memory_limit=None):
+        """
+        짧은 변이 min_size 이상으로 유지되는 가장 작은 해상도로 이미지 로드
+        JPEG 은 draft 로 디코더 단계에서 1/2~1/8 로 줄여 읽고, 그 외 형식은 디코딩 직후 reduce 로 줄인다.
+        memory_limit(바이트) 를 주면 픽셀 수 검사 없이 열고, 디코딩 버퍼가 한도를 넘으면 load_strips 로
+        띠 단위 디코딩 + 축소를 한다.
+        반환값: (image, stats) - stats 에 원본/디코드/결과 크기, 소요 시간, 최대 픽셀 버퍼 크기 기록
+        """
+        start = time.perf_counter()
+        image = ImageProcessor.open_unbounded(path) if memory_limit else Image.open(path)
+        source_size = image.size
+        image.draft(image.mode, (min_size, min_size))  # JPEG 이외 형식에서는 아무 것도 하지 않음
+        needed = ImageProcessor.image_bytes(image)
+        if image.mode not in ImageProcessor.REDUCE_MODES:
+            needed += image.size[0] * image.size[1] * 4  # reduce 전 RGBA 변환본
+        if memory_limit and needed > memory_limit:
+            reduced, peak_bytes = ImageProcessor.load_strips(path, image, min_size, memory_limit)
+            stats = {
+                'source_size': source_size,
+                'decoded_size': reduced.size,
+                'size': reduced.size,
+                'seconds': time.perf_counter() - start,
+                'peak_bytes': peak_bytes,
+                'strips': True,
+            }
+            return reduced, stats
+        image.load()
+        decoded_size = image.size
+        peak_bytes = ImageProcessor.image_bytes(image)
+
+        factor = min(image.size[0] // min_size, image.size[1] // min_size)
+        if factor >= 2:
+            source = image if image.mode in ImageProcessor.REDUCE_MODES else image.convert('RGBA')
+            reduced = source.reduce(factor)
+            peak_bytes = max(peak_bytes, ImageProcessor.image_bytes(source) + ImageProcessor.image_bytes(reduced))
+            image.close()
+            image = reduced
+
+        stats = {
+            'source_size': source_size,
+            'decoded_size': decoded_size,
+            'size': image.size,
+            'seconds': time.perf_counter() - start,
+            'peak_bytes': peak_bytes,
+        }
+        return image, stats
+
+    @staticmethod
+    def raw_stride(mode, rawmode, width):
+        """raw 디코더 한 행의 바이트 수 (타일 인자에 stride 가 0 으로 들어 있을 때 계산)"""
+        try:
+            return len(Image.new(mode, (width, 1)).tobytes('raw', rawmode))
+        except (ValueError, OSError):
+            raise ValueError(f"행 크기를 알 수 없는 raw 형식입니다 ({mode}/{rawmode})")
+
+    @staticmethod
+    def make_tile(codec, extents, offset, args):
+        """디코더 타일 생성 (Pillow 11 이상은 load() 가 .offset 등 이름으로 읽으므로 ImageFile._Tile, 이전 버전은 튜플)"""
+        tile_type = getattr(ImageFile, '_Tile', None)
+        return tile_type(codec, extents, offset, args) if tile_type else (codec, extents, offset, args)
+
+    @staticmethod
+    def iter_strips(image, rows):
+        """
+        타일 목록을 가로 띠 단위로 나눠 (시작 행, 끝 행, 띠 기준 타일 목록) 생성
+        - 타일 하나짜리 raw (BMP, PPM, 비압축 TIFF 등): 행 오프셋을 직접 계산해 rows 행씩 자른다.
+        - 여러 타일/스트립 (TIFF 등): 행 범위가 이어지는 타일들을 rows 행 이상이 될 때까지 모은다.
+        그 외 (PNG 등 전체가 압축 스트림 하나) 는 부분 디코딩할 수 없어 ValueError.
+        """
+        width, height = image.size
+        tiles = [tuple(tile) for tile in image.tile]
+        if len(tiles) == 1 and tiles[0][0] == 'raw':
+            _, extents, offset, args = tiles[0]
+            if isinstance(args, str):
+                args = (args, 0, 1)
+            rawmode, stride, orientation = (tuple(args) + (0, 1))[:3]
+            if tuple(extents) != (0, 0, width, height):
+                raise ValueError("부분 영역 타일은 띠 단위로 디코딩할 수 없습니다")
+            stride = stride or ImageProcessor.raw_stride(image.mode, rawmode, width)
+            for y0 in range(0, height, rows):
+                y1 = min(height, y0 + rows)
+                # 아래 행부터 저장된 경우 (BMP) 파일에서는 띠의 마지막 행이 먼저 나온다
+                first_row = height - y1 if orientation < 0 else y0
+                yield y0, y1, [ImageProcessor.make_tile('raw', (0, 0, width, y1 - y0), offset + first_row * stride,
+                                                        (rawmode, stride, orientation))]
+            return
+        if len(tiles) == 1:
+            raise ValueError(f"{image.format} 형식은 띠 단위 디코딩을 지원하지 않습니다 ({tiles[0][0]})")
+
+        def shifted(band, top):
+            return [ImageProcessor.make_tile(name, (x0, ty0 - top, x1, ty1 - top), offset, args)
+                    for name, (x0, ty0, x1, ty1), offset, args in band]
+
+        band, top, bottom = [], 0, 0
+        for tile in sorted(tiles, key=lambda t: (t[1][1], t[1][0])):
+            tile_top, tile_bottom = tile[1][1], tile[1][3]
+            # 다음 타일이 현재 띠 아래에서 시작하고, 붙이면 rows 행을 넘는 경우 지금까지의 띠를 내보냄
+            if band and tile_top >= bottom and max(bottom, tile_bottom) - top > rows:
+                yield top, bottom, shifted(band, top)
+                band, top = [], bottom
+            band.append(tile)
+            bottom = max(bottom, tile_bottom)
+        if band:
+            yield top, bottom, shifted(band, top)
+
+    @staticmethod
+    def load_strips(path, image, min_size, memory_limit):
+        """
+        메모리 한도 안에서 원본을 가로 띠 단위로 디코딩하며 정수 배율 box 축소 결과를 이어 붙임
+        띠 높이는 배율의 배수로 맞추고, 나누어떨어지지 않고 남은 행은 다음 띠 앞에 붙여 경계 없이 축소한다.
+        반환값: (축소된 이미지, 최대 픽셀 버퍼 크기 추정)
+        """
+        width, height = image.size
+        factor = max(1, min(width // min_size, height // min_size))
+        output_bytes = -(-width // factor) * -(-height // factor) * 4
+        row_bytes = width * 4
+        # 띠 디코딩 버퍼 + RGBA 변환본 + 이전 띠 나머지(배율 미만 행)와 합친 사본, 세 벌이 동시에 있을 수 있다
+        rows = ((memory_limit - output_bytes) // (row_bytes * 3) - factor) // factor * factor
+        if rows < factor:
+            raise MemoryError(f"메모리 한도 {memory_limit / (1024 * 1024):.0f}MB 로는 "
+                              f"{width}x{height} 원본을 {factor}배 축소할 수 없습니다")
+        strips = list(ImageProcessor.iter_strips(image, rows))
+        image.close()
+
+        result = None
+        carry = None  # 이전 띠에서 배율로 나누어떨어지지 않고 남은 행
+        peak_bytes = output_bytes
+        output_row = 0
+        for top, bottom, tiles in strips:
+            if (bottom - top + factor) * row_bytes * 3 + output_bytes > memory_limit:
+                raise MemoryError(f"파일의 스트립/타일이 너무 큽니다 ({bottom - top}행), 메모리 한도를 지킬 수 없습니다")
+            strip = ImageProcessor.open_unbounded(path)
+            strip._size = (width, bottom - top)  # 띠 크기의 이미지로 보고 해당 타일만 디코딩
+            if hasattr(strip, '_tile_size'):
+                strip._tile_size = strip._size  # TIFF 는 이 크기로 디코딩 버퍼를 만듦
+            strip.tile = tiles
+            strip.load()
+            if strip.mode not in ImageProcessor.REDUCE_MODES:
+                strip = strip.convert('RGBA')
+            if carry is not None:
+                merged = Image.new(strip.mode, (width, carry.size[1] + strip.size[1]))
+                merged.paste(carry, (0, 0))
+                merged.paste(strip, (0, carry.size[1]))
+                strip = merged
+            peak_bytes = max(peak_bytes, output_bytes + ImageProcessor.image_bytes(strip) * 3)
+            usable = strip.size[1] if bottom >= height else strip.size[1] // factor * factor
+            carry = strip.crop((0, usable, width, strip.size[1])) if usable < strip.size[1] else None
+            if not usable:
+                continue
+            reduced = (strip if usable == strip.size[1] else strip.crop((0, 0, width, usable))).reduce(factor)
+            if result is None:
+                result = Image.new(reduced.mode, (reduced.size[0], -(-height // factor)))
+            result.paste(reduced, (0, output_row))
+            output_row += reduced.size[1]
+        if result is None:
+            raise ValueError("디코딩된 띠가 없습니다")
+        return result, peak_bytes
+
+    @staticmethod
+    def format_load_stats(stats):
+        """load_reduced 통계를 한 줄 문자열로"""
+        return (f"원본 {stats['source_size'][0]}x{stats['source_size'][1]} -> 디코드 "
+                f"{stats['decoded_size'][0]}x{stats['decoded_size'][1]}{' (띠 단위)' if stats.get('strips') else ''}, "
+                f"{stats['seconds'] * 1000:.0f}ms, 최대 {stats['peak_bytes'] / (1024 * 1024):.1f}MB")
+
+    @staticmethod
+    def resolve_resample(resample):
+        """필터 이름 또는 Pillow 상수를 Pillow 리샘플 상수로 변환"""
+        if isinstance(resample, str):
+            try:
+                return ImageProcessor.RESAMPLE_FILTERS[resample.lower()]
+            except KeyError:
+                raise ValueError(f"지원하지 않는 리샘플 필터: {resample}")
+        return resample
+
+    @staticmethod
+    def fit_square(image, size, resample=Image.Resampling.LANCZOS):
+        """비율을 유지해 size x size 안에 맞추고, 남는 영역은 투명으로 채운 RGBA 이미지 반환"""
+        width, height = image.size
+        scale = size / max(width, height)
+        target = (max(1, round(width * scale)), max(1, round(height * scale)))
+        resized = image.resize(target, resample) if target != image.size else image.copy()
+        if resized.mode != 'RGBA':  # RGB, premultiplied RGBa 모두 RGBA로 통일
+            resized = resized.convert('RGBA')
+        if target == (size, size):
+            return resized
+        canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        canvas.paste(resized, ((size - target[0]) // 2, (size - target[1]) // 2))
+        return canvas
+
+    @staticmethod
+    @instrumentation.wrap('resample')
+    def build_pyramid(image, sizes, resample=DEFAULT_RESAMPLE, progress_callback=None, cancel_event=None):
+        """
+        해상도 피라미드 생성
+        원본을 2배씩 box 축소한 중간 단계를 한 번만 만들고,
+        각 해상도는 배율 여유가 남는 가장 가까운 상위 단계에서 선택한 필터로 축소한다.
+        progress_callback(완료 수, 전체 수, 해상도) 는 해상도마다 호출되며,
+        cancel_event 가 설정되면 다음 해상도로 넘어가기 전에 OperationCancelled 를 발생시킨다.
+        반환값: {size: size x size RGBA 이미지}
+        """
+        resample = ImageProcessor.resolve_resample(resample)
+        targets = sorted(set(sizes), reverse=True)
+        if not targets:
+            return {}
+
+        level = image
+        if level.mode not in ('RGB', 'RGBA'):
+            level = level.convert('RGBA')
+        if level.mode == 'RGBA':
+            # 투명 영역 색이 가장자리로 번지지 않도록 중간 단계는 premultiplied(RGBa)로 유지
+            level = level.convert('RGBa')
+
+        pyramid = {}
+        for index, size in enumerate(targets):
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+            # 현재 단계가 목표의 (HEADROOM * 2) 배 이상이면 한 단계 더 내려간다
+            while min(level.size) // 2 >= size * ImageProcessor.PYRAMID_HEADROOM:
+                level = level.reduce(2)
+            pyramid[size] = ImageProcessor.fit_square(level, size, resample)
+            if progress_callback:
+                progress_callback(index + 1, len(targets), size)
+        return pyramid
+
+    @staticmethod
+    def kernel_weights(x, name):
+        """필터 커널 값 (x 는 출력 픽셀 중심에서 입력 픽셀 중심까지의 거리, 출력 픽셀 단위)"""
+        ax = np.abs(x)
+        if name in ('nearest', 'box'):
+            return ((x >= -0.5) & (x < 0.5)).astype(np.float32)
+        if name == 'bilinear':
+            return np.maximum(0, 1 - ax)
+        if name == 'hamming':
+            return np.where(ax < 1, np.sinc(x) * (0.46 + 0.54 * np.cos(np.pi * x)), 0)
+        if name == 'bicubic':
+            a = -0.5
+            return np.where(ax < 1, (a + 2) * ax ** 3 - (a + 3) * ax ** 2 + 1,
+                            np.where(ax < 2, a * ax ** 3 - 5 * a * ax ** 2 + 8 * a * ax - 4 * a, 0))
+        return np.where(ax < 3, np.sinc(x) * np.sinc(x / 3), 0)
+
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def resample_weights(in_size, out_size, name=DEFAULT_RESAMPLE):
+        """
+        1차원 축소 가중치 행렬 (out_size x in_size, 행 합 1, 크기/필터별로 캐시되므로 읽기 전용)
+        축소 시에는 커널을 배율만큼 넓혀 (antialias) 모든 입력 픽셀이 기여하도록 한다.
+        """
+        scale = in_size / out_size
+        stretch = max(scale, 1.0)
+        centers = (np.arange(out_size, dtype=np.float64) + 0.5) * scale
+        distance = (np.arange(in_size, dtype=np.float64)[None, :] + 0.5 - centers[:, None]) / stretch
+        weights = ImageProcessor.kernel_weights(distance, name)
+        totals = weights.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1
+        weights = (weights / totals).astype(np.float32)
+        weights.setflags(write=False)
+        return weights
+
+    @staticmethod
+    def unsharp(pixels, amount):
+        """premultiplied (H, W, 4) 배열에 3x3 [1 2 1] 블러 기반 언샤프 마스크 적용 (색은 알파 이하로 제한)"""
+        padded = np.pad(pixels, ((1, 1), (1, 1), (0, 0)), mode='edge')
+        rows = (padded[:-2] + 2 * padded[1:-1] + padded[2:]) / 4
+        blurred = (rows[:, :-2] + 2 * rows[:, 1:-1] + rows[:, 2:]) / 4
+        sharpened = pixels + amount * (pixels - blurred)
+        alpha = np.clip(sharpened[..., 3:4], 0, 255)
+        return np.concatenate([np.clip(sharpened[..., :3], 0, alpha), alpha], axis=2)
+
+    @staticmethod
+    def unpremultiply(pixels, size):
+        """premultiplied 부동소수 배열을 RGBA 로 되돌려 size x size 투명 캔버스 가운데에 배치"""
+        alpha = np.clip(pixels[..., 3:4], 0, 255)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rgb = np.where(alpha > 0, pixels[..., :3] * 255 / alpha, 0)
+        rgba = np.rint(np.clip(np.concatenate([rgb, alpha], axis=2), 0, 255)).astype(np.uint8)
+        image = Image.fromarray(rgba, 'RGBA')
+        if image.size == (size, size):
+            return image
+        canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        canvas.paste(image, ((size - image.size[0]) // 2, (size - image.size[1]) // 2))
+        return canvas
+
+    @staticmethod
+    @instrumentation.wrap('resample')
+    def build_pyramid_vectorized(image, sizes, resample=DEFAULT_RESAMPLE, sharpen=None,
+                                 progress_callback=None, cancel_event=None):
+        """
+        NumPy 해상도 피라미드 (build_pyramid 와 같은 반환 형식)
+        premultiplied 배열에서 분리형 가중치 행렬로 축소한다. 세로 방향은 모든 해상도의 가중치 행렬을
+        위아래로 쌓아 행렬곱 한 번으로 처리하고, 가로 방향만 해상도별로 곱한다.
+        sharpen 이 True 이면 SHARPEN_AMOUNTS, dict 이면 {size: 강도} 로 해상도별 언샤프 마스크를 적용한 뒤
+        un-premultiply 한다. 원본이 목표보다 훨씬 크면 먼저 Pillow reduce 로 (2배씩, premultiplied) 줄인다.
+        """
+        if np is None:
+            raise RuntimeError("NumPy 축소 경로에는 numpy 가 필요합니다")
+        resample = resample.lower() if isinstance(resample, str) else ImageProcessor.DEFAULT_RESAMPLE
+        if resample not in ImageProcessor.KERNEL_SUPPORT:
+            raise ValueError(f"지원하지 않는 리샘플 필터: {resample}")
+        amounts = ImageProcessor.SHARPEN_AMOUNTS if sharpen is True else (sharpen or {})
+        targets = sorted(set(sizes), reverse=True)
+        if not targets:
+            return {}
+
+        level = image if image.mode in ('RGBA', 'RGBa') else image.convert('RGBA')
+        if level.mode == 'RGBA':
+            level = level.convert('RGBa')
+        while min(level.size) // 2 >= targets[0] * ImageProcessor.PYRAMID_HEADROOM:
+            level = level.reduce(2)
+        pixels = np.asarray(level, dtype=np.float32)
+        height, width = pixels.shape[:2]
+
+        dims = {}
+        for size in targets:
+            scale = size / max(width, height)
+            dims[size] = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        # 세로 축소: (모든 해상도 높이 합 x H) @ (H x W*4)
+        vertical = np.vstack([ImageProcessor.resample_weights(height, dims[size][1], resample) for size in targets])
+        rows = vertical @ pixels.reshape(height, width * 4)
+
+        pyramid = {}
+        start = 0
+        for index, size in enumerate(targets):
+            if cancel_event is not None and cancel_event.is_set():
+                raise OperationCancelled()
+            target_width, target_height = dims[size]
+            part = rows[start:start + target_height].reshape(target_height, width, 4)
+            start += target_height
+            # 가로 축소: (w x W) @ (행마다 W x 4) -> (h, w, 4)
+            result = ImageProcessor.resample_weights(width, target_width, resample) @ part
+            if amounts.get(size):
+                result = ImageProcessor.unsharp(result, amounts[size])
+            pyramid[size] = ImageProcessor.unpremultiply(result, size)
+            if progress_callback:
+                progress_callback(index + 1, len(targets), size)
+        return pyramid
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def make_checkerboard(width, height, colors=('#e0e0e0', '#f0f0f0'), square_size=10):
+        """
+        투명 배경 표시용 체커보드 RGBA 이미지 (테마 색상/크기별로 캐시)
+        칸 하나를 1픽셀로 그린 작은 이미지를 NEAREST 로 확대해 한 번에 만든다.
+        """
+        cols = -(-width // square_size)
+        rows = -(-height // square_size)
+        cells = Image.new('RGBA', (cols, rows), colors[0])
+        odd = Image.new('RGBA', (1, 1), colors[1])
+        for y in range(rows):
+            for x in range((y + 1) % 2, cols, 2):
+                cells.paste(odd, (x, y))
+        board = cells.resize((cols * square_size, rows * square_size), Image.Resampling.NEAREST)
+        return board.crop((0, 0, width, height))
+
+    @staticmethod
+    def composite_on_checkerboard(image, checkerboard):
+        """RGBA 이미지를 체커보드 가운데에 합성한 새 이미지 반환 (Tk 객체 없이 PIL 에서 처리)"""
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        result = checkerboard.copy()
+        x = (result.size[0] - image.size[0]) // 2
+        y = (result.size[1] - image.size[1]) // 2
+        result.alpha_composite(image, (max(0, x), max(0, y)))
+        return result
+
+
+class ICOWriter:
+    """
+    ICO 컨테이너 직접 작성
+    엔트리마다 PNG 또는 32비트 BMP(+AND 마스크)를 골라 병렬로 인코딩하고,
+    디렉터리와 오프셋은 인코딩이 끝난 뒤 한 번에 계산한다.
+    """
+    FORMATS = ('png', 'bmp')
+    PNG_MIN_SIZE = 64  # 이 크기 이상은 PNG, 미만은 레거시 호환을 위해 BMP
+    PNG_COMPRESS_LEVEL = 9
+
+    @staticmethod
+    def choose_format(size):
+        return 'png' if size >= ICOWriter.PNG_MIN_SIZE else 'bmp'
+
+    @staticmethod
+    def encode_png(image, compress_level=PNG_COMPRESS_LEVEL, compress_type=-1, optimize=False):
+        """compress_type 은 zlib 압축 전략 (zlib.Z_FILTERED, zlib.Z_RLE 등, -1 은 기본값)"""
+        buffer = io.BytesIO()
+        image.save(buffer, format='PNG', compress_level=compress_level, compress_type=compress_type, optimize=optimize)
+        return buffer.getvalue()
+
+    @staticmethod
+    def dib_stride(width, bits):
+        """DIB 한 행의 바이트 수 (4바이트 정렬)"""
+        return (width * bits + 31) // 32 * 4
+
+    @staticmethod
+    def encode_and_mask(alpha):
+        """완전 투명 픽셀을 1로 표시한 AND 마스크 (행마다 4바이트 정렬, 아래 행부터)"""
+        mask = alpha.point(lambda a: 255 if a == 0 else 0, '1')
+        return mask.tobytes('raw', ('1', ICOWriter.dib_stride(alpha.size[0], 1), -1))
+
+    @staticmethod
+    def encode_bmp(image):
+        """ICO 엔트리용 32비트 BGRA DIB (BITMAPINFOHEADER 의 높이는 XOR + AND 마스크 합이라 2배)"""
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        width, height = image.size
+        pixels = image.tobytes('raw', 'BGRA', 0, -1)
+        and_mask = ICOWriter.encode_and_mask(image.getchannel('A'))
+        header = BITMAPINFOHEADER.pack(BITMAPINFOHEADER.size, width, height * 2, 1, 32, 0,
+                                       len(pixels) + len(and_mask), 0, 0, 0, 0)
+        return header + pixels + and_mask
+
+    @staticmethod
+    def encode_bmp_indexed(indexed, alpha, bits):
+        """
+        팔레트 DIB (8비트 또는 4비트) + AND 마스크
+        indexed 는 'P' 모드 이미지, alpha 는 완전 투명 여부만 AND 마스크로 기록된다.
+        반환값: (색상 수, 데이터)
+        """
+        width, height = indexed.size
+        colors = min(len(indexed.getpalette() or []) // 3, 1 << bits)
+        palette = indexed.getpalette()[:colors * 3]
+        palette_bytes = b''.join(bytes((palette[i + 2], palette[i + 1], palette[i], 0)) for i in range(0, len(palette), 3))
+        rawmode = 'P' if bits == 8 else f'P;{bits}'
+        pixels = indexed.tobytes('raw', (rawmode, ICOWriter.dib_stride(width, bits), -1))
+        and_mask = ICOWriter.encode_and_mask(alpha)
+        header = BITMAPINFOHEADER.pack(BITMAPINFOHEADER.size, width, height * 2, 1, bits, 0,
+                                       len(pixels) + len(and_mask), 0, 0, colors, 0)
+        return colors, header + palette_bytes + pixels + and_mask
+
+    @staticmethod
+    @instrumentation.wrap('encode')
+    def encode_entry(image, fmt):
+        """이미지 한 장을 (너비, 높이, 색상 수, 비트 수, 데이터) 엔트리로 인코딩"""
+        if fmt == 'png':
+            data = ICOWriter.encode_png(image)
+        elif fmt == 'bmp':
+            data = ICOWriter.encode_bmp(image)
+        else:
+            raise ValueError(f"지원하지 않는 엔트리 형식: {fmt}")
+        return image.size[0], image.size[1], 0, 32, data
+
+    @staticmethod
+    def encode_entries(frames, formats=None, workers=None):
+        """
+        프레임들을 병렬 인코딩 (결과 순서는 frames 순서와 동일)
+        formats: {size: 'png'|'bmp'} - 없는 크기는 choose_format 규칙을 따른다.
+        """
+        formats = formats or {}
+        jobs = [(frame, formats.get(frame.size[0]) or ICOWriter.choose_format(frame.size[0])) for frame in frames]
+        if len(jobs) <= 1 or workers == 1:
+            return [ICOWriter.encode_entry(frame, fmt) for frame, fmt in jobs]
+        with ThreadPoolExecutor(max_workers=workers or min(len(jobs), 8)) as pool:
+            return list(pool.map(ICOWriter.encode_entry, *zip(*jobs)))
+
+    @staticmethod
+    def iter_encoded(frames, formats=None, workers=None):
+        """
+        엔트리를 병렬 인코딩하면서 frames 순서대로 하나씩 내보냄
+        동시에 진행/보관되는 결과는 워커 수 이하로 유지된다.
+        """
+        formats = formats or {}
+        jobs = [(frame, formats.get(frame.size[0]) or ICOWriter.choose_format(frame.size[0])) for frame in frames]
+        if len(jobs) <= 1 or workers == 1:
+            for frame, fmt in jobs:
+                yield ICOWriter.encode_entry(frame, fmt)
+            return
+        workers = workers or min(len(jobs), 8)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for frame, fmt in jobs:
+                pending.append(pool.submit(ICOWriter.encode_entry, frame, fmt))
+                if len(pending) >= workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    @instrumentation.wrap('write')
+    def write_stream(output_path, entries, count, cancel_event=None, type_=1, fields=None):
+        """
+        인코딩된 엔트리를 버퍼드 writer 로 곧바로 파일에 쓰고, 마지막에 디렉터리 오프셋을 채움
+        같은 폴더의 임시 파일에 쓴 뒤 교체하므로 실패하거나 취소되면 기존 파일은 그대로 남는다.
+        data 는 bytes 외에 memoryview 도 받으므로 기존 파일의 엔트리를 복사 없이 그대로 옮겨 쓸 수 있다.
+        type_ 은 헤더 Type (1: ICO, 2: CUR), fields 는 엔트리별 디렉터리 (Planes, BitCount) 값 목록으로
+        없으면 (1, 엔트리 비트 수) 를 쓴다.
+        반환값: 엔트리 메타데이터 목록 (ICOEntry.as_dict 와 같은 키)
+        """
+        directory_end = ICO_HEADER.size + count * ICO_DIR_ENTRY.size
+        offset = directory_end
+        records = []
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb', buffering=1024 * 1024) as f:
+                f.write(ICO_HEADER.pack(0, type_, count))
+                f.write(b'\0' * (directory_end - ICO_HEADER.size))  # 디렉터리 자리 확보
+                for index, (width, height, colors, bit_count, data) in enumerate(entries):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise OperationCancelled()
+                    f.write(data)
+                    planes, bit_count = fields[index] if fields is not None else (1, bit_count)
+                    records.append((width, height, colors, planes, bit_count, len(data), offset))
+                    offset += len(data)
+                if len(records) != count:
+                    raise ValueError(f"엔트리 수 불일치: {len(records)} != {count}")
+                f.seek(ICO_HEADER.size)
+                # 0 은 256 을 의미
+                f.write(b''.join(ICO_DIR_ENTRY.pack(width % 256, height % 256, colors, 0, planes, bit_count, size,
+                                                    data_offset)
+                                 for width, height, colors, planes, bit_count, size, data_offset in records))
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return [{'Width': width, 'Height': height, 'Colors': colors, 'Planes': planes, 'BitCount': bit_count,
+                 'Size': size, 'Offset': data_offset}
+                for width, height, colors, planes, bit_count, size, data_offset in records]
+
+    @staticmethod
+    def assemble(entries):
+        """인코딩된 엔트리들로 헤더 + 디렉터리 + 이미지 데이터를 한 번에 조립"""
+        offset = ICO_HEADER.size + len(entries) * ICO_DIR_ENTRY.size
+        parts = [ICO_HEADER.pack(0, 1, len(entries))]
+        for width, height, colors, bit_count, data in entries:
+            # 0 은 256 을 의미
+            parts.append(ICO_DIR_ENTRY.pack(width % 256, height % 256, colors, 0, 1, bit_count, len(data), offset))
+            offset += len(data)
+        parts.extend(entry[4] for entry in entries)
+        return b''.join(parts)
+
+
+class ICOOptimizer:
+    """
+    엔트리마다 여러 인코딩을 시도해 디코딩 결과가 원본과 같은 것 중 가장 작은 것을 선택
+    후보: PNG (압축 레벨 x zlib 전략, optimize), 32비트 BMP, 무손실 팔레트 BMP (8/4비트)
+    """
+    PNG_CANDIDATES = [(level, strategy) for level in (6, 9)
+                      for strategy in (-1, zlib.Z_FILTERED, zlib.Z_RLE)]
+    DEFAULT_TIME_BUDGET = 5.0  # 초, 전체 후보 시도 시간 상한
+
+    @staticmethod
+    def candidates(image):
+        """이미지에 적용할 수 있는 후보 이름 목록"""
+        names = [f'png:{level}:{strategy}' for level, strategy in ICOOptimizer.PNG_CANDIDATES]
+        names += ['png:optimize', 'bmp:32']
+        alpha = image.getchannel('A')
+        colors = image.getcolors(256)
+        # 팔레트 BMP 는 알파를 AND 마스크(완전 투명/불투명)로만 표현할 수 있다
+        alpha_values = {value for _, value in alpha.getcolors(256)}
+        if colors is not None and alpha_values <= {0, 255}:
+            opaque = {rgba[:3] for _, rgba in colors if rgba[3] == 255}
+            # 투명 픽셀이 있으면 투명용 검정 한 칸을 팔레트에 예약 (to_indexed 참고)
+            used = len(opaque) + (1 if 0 in alpha_values else 0)
+            if used <= 16:
+                names.append('bmp:4')
+            if used <= 256:
+                names.append('bmp:8')
+        return names
+
+    @staticmethod
+    def to_indexed(image, max_colors):
+        """
+        불투명 색상이 max_colors 이하인 이미지를 정확한 팔레트의 'P' 이미지로 변환
+        투명 픽셀이 있으면 0번을 검정으로 예약해 투명 픽셀을 모두 0번으로 둔다
+        (AND 마스크 뒤 XOR 값이 0 이어야 Windows 에서 바탕 화면이 그대로 보임, ICOPalettizer 와 같은 규칙).
+        """
+        alpha = image.getchannel('A')
+        reserve = 1 if alpha.getextrema()[0] == 0 else 0
+        colors = [(0, 0, 0)] * reserve + sorted({rgba[:3] for _, rgba in image.getcolors(256) if rgba[3] == 255})
+        colors = colors or [(0, 0, 0)]
+        flat = [c for rgb in colors for c in rgb]
+        palette = Image.new('P', (1, 1))
+        # 남는 칸은 마지막 색을 반복 (같은 거리면 앞 인덱스가 선택되므로 실제 색 범위 밖 인덱스는 나오지 않음)
+        palette.putpalette(flat + flat[-3:] * (max_colors - len(colors)))
+        indexed = image.convert('RGB').quantize(palette=palette, dither=Image.Dither.NONE)
+        if reserve:
+            indexed.paste(0, mask=alpha.point(lambda a: 255 if a == 0 else 0))
+        indexed.putpalette(flat)  # 실제 사용하는 색상 수만큼만 팔레트를 기록
+        return indexed
+
+    @staticmethod
+    def encode_candidate(image, name):
+        """후보 이름에 해당하는 인코딩으로 (너비, 높이, 색상 수, 비트 수, 데이터) 엔트리 생성"""
+        kind, _, option = name.partition(':')
+        width, height = image.size
+        if kind == 'png':
+            if option == 'optimize':
+                data = ICOWriter.encode_png(image, optimize=True)
+            else:
+                level, strategy = (int(v) for v in option.split(':'))
+                data = ICOWriter.encode_png(image, level, strategy)
+            return width, height, 0, 32, data
+        if option == '32':
+            return width, height, 0, 32, ICOWriter.encode_bmp(image)
+        bits = int(option)
+        colors, data = ICOWriter.encode_bmp_indexed(ICOOptimizer.to_indexed(image, 1 << bits), image.getchannel('A'), bits)
+        return width, height, colors if colors < 256 else 0, bits, data
+
+    @staticmethod
+    def is_lossless(image, entry):
+        """엔트리를 실제로 디코딩해 원본과 (premultiplied 기준으로) 같은지 확인"""
+        with ICOFile(ICOWriter.assemble([entry])) as ico_file:
+            decoded = ico_file.decode(0)
+        if decoded.size != image.size:
+            return False
+        return decoded.convert('RGBA').convert('RGBa').tobytes() == image.convert('RGBa').tobytes()
+
+    @staticmethod
+    def try_candidate(image, name):
+        # Image.save 는 이미지 객체에 encoderinfo 를 기록하므로, 같은 프레임을 여러 스레드에서 저장하지 않도록 복사본 사용
+        image = image.copy()
+        entry = ICOOptimizer.encode_candidate(image, name)
+        return name, entry, ICOOptimizer.is_lossless(image, entry)
+
+    @staticmethod
+    def optimize_entries(frames, formats=None, time_budget=DEFAULT_TIME_BUDGET, workers=None):
+        """
+        프레임별 최소 크기 엔트리 선택
+        기준 엔트리(ICOWriter 기본 인코딩)는 항상 만들어 두고, 나머지 후보는 스레드 풀에서 병렬로 시도하되
+        time_budget 초가 지나면 끝나지 않은 후보는 버린다.
+        반환값: (엔트리 목록, [{'size', 'baseline', 'best', 'format', 'saved'}, ...])
+        """
+        frames = [frame if frame.mode == 'RGBA' else frame.convert('RGBA') for frame in frames]
+        baseline = ICOWriter.encode_entries(frames, formats, workers=workers)
+        best = [('default', entry) for entry in baseline]
+        # 같은 크기면 후보 목록 순서가 앞선 쪽을 골라, 모든 후보가 시간 안에 끝나면 결과가 항상 같게 한다
+        rank = [-1] * len(frames)
+
+        deadline = time.perf_counter() + time_budget
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            futures = {pool.submit(ICOOptimizer.try_candidate, frame, name): (index, order)
+                       for index, frame in enumerate(frames)
+                       for order, name in enumerate(ICOOptimizer.candidates(frame))}
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.perf_counter()))
+            for future in done:
+                if future.exception() is not None:
+                    continue
+                name, entry, valid = future.result()
+                index, order = futures[future]
+                if valid and (len(entry[4]), order) < (len(best[index][1][4]), rank[index]):
+                    best[index] = (name, entry)
+                    rank[index] = order
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        report = []
+        for (name, entry), base in zip(best, baseline):
+            saved = len(base[4]) - len(entry[4])
+            report.append({'size': entry[0], 'baseline': len(base[4]), 'best': len(entry[4]),
+                           'format': name, 'saved': saved})
+        return [entry for _, entry in best], report
+
+    @staticmethod
+    def format_report(report):
+        """optimize_entries 보고서를 사람이 읽을 수 있는 여러 줄 문자열로"""
+        lines = []
+        for row in report:
+            percent = row['saved'] / row['baseline'] * 100 if row['baseline'] else 0
+            lines.append(f"{row['size']:>4}px  {row['baseline']:>7} -> {row['best']:>7} bytes "
+                         f"({percent:5.1f}% 절감, {row['format']})")
+        total_base = sum(row['baseline'] for row in report)
+        total_best = sum(row['best'] for row in report)
+        if total_base:
+            lines.append(f"합계  {total_base} -> {total_best} bytes ({(total_base - total_best) / total_base * 100:.1f}% 절감)")
+        return "\n".join(lines)
+
+
+class ICOPalettizer:
+    """
+    작은 해상도 엔트리를 8비트/4비트 팔레트 BMP 로 변환 (손실 압축, NumPy 벡터 연산)
+    median cut 으로 초기 팔레트를 만들고 k-means 로 몇 번 다듬은 뒤, Bayer 순서 디더링 적용/미적용 둘 다 만들어
+    품질(PSNR)이 min_psnr 이상인 것 중 가장 작은 비트 수를 고른다. 기준을 못 넘으면 기존 엔트리를 그대로 둔다.
+    알파는 AND 마스크(완전 투명/불투명)로만 표현되므로 반투명 가장자리 손실도 PSNR 에 포함된다.
+    """
+    SIZES = (16, 20, 24, 32)
+    DEFAULT_MIN_PSNR = 30.0  # 반투명 가장자리를 AND 마스크로 자르는 손실까지 포함한 값
+    BITS = (4, 8)
+    KMEANS_ITERATIONS = 4
+    ALPHA_THRESHOLD = 128  # 이 값 이상이면 불투명으로 기록
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def bayer_matrix(order=4):
+        """-0.5 ~ 0.5 범위로 정규화한 order x order Bayer 임계값 행렬"""
+        matrix = np.zeros((1, 1), dtype=np.float32)
+        while matrix.shape[0] < order:
+            matrix = np.block([[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]])
+        return (matrix + 0.5) / matrix.size - 0.5
+
+    @staticmethod
+    def median_cut(pixels, colors):
+        """(N, 3) 픽셀을 가장 넓은 채널 기준으로 반씩 나눠 colors 개 상자의 평균색 반환"""
+        boxes, channels, scores = [], [], []
+
+        def add(box):
+            span = box.max(axis=0) - box.min(axis=0)
+            boxes.append(box)
+            channels.append(int(span.argmax()))
+            scores.append(float(span.max()) * len(box))
+
+        add(pixels)
+        while len(boxes) < colors:
+            index = max(range(len(scores)), key=scores.__getitem__)
+            if scores[index] <= 0:
+                break
+            box, channel = boxes.pop(index), channels.pop(index)
+            scores.pop(index)
+            order = np.argsort(box[:, channel], kind='stable')
+            half = len(box) // 2
+            add(box[order[:half]])
+            add(box[order[half:]])
+        return np.array([box.mean(axis=0) for box in boxes], dtype=np.float32)
+
+    @staticmethod
+    def nearest(pixels, palette):
+        """각 픽셀에 가장 가까운 팔레트 색 인덱스 ((N, K) 거리 행렬 한 번으로 계산)"""
+        distances = ((pixels[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+        return distances.argmin(axis=1)
+
+    @staticmethod
+    def build_palette(pixels, colors):
+        """불투명 픽셀 (N, 3) 로 최대 colors 색 팔레트 생성 (색이 충분히 적으면 정확한 팔레트)"""
+        unique = np.unique(pixels.astype(np.uint8), axis=0)
+        if len(unique) <= colors:
+            return unique.astype(np.float32)
+        palette = ICOPalettizer.median_cut(pixels, colors)
+        for _ in range(ICOPalettizer.KMEANS_ITERATIONS):
+            labels = ICOPalettizer.nearest(pixels, palette)
+            counts = np.bincount(labels, minlength=len(palette)).astype(np.float32)
+            sums = np.zeros_like(palette)
+            np.add.at(sums, labels, pixels)
+            used = counts > 0
+            palette[used] = sums[used] / counts[used, None]
+        return palette
+
+    @staticmethod
+    def make_palette(rgba, bits):
+        """
+        (H, W, 4) uint8 배열의 불투명 픽셀로 팔레트 생성
+        투명 픽셀이 있으면 0번을 검정으로 예약한다 (AND 마스크 뒤 XOR 값이 0 이어야 화면이 그대로 보임).
+        반환값: (팔레트 (K, 3) float32 - 예약 색 제외, 불투명 마스크 (H, W) bool, 예약 색 수)
+        """
+        opaque = rgba[..., 3] >= ICOPalettizer.ALPHA_THRESHOLD
+        reserve = 0 if opaque.all() else 1
+        pixels = rgba[..., :3][opaque].astype(np.float32)
+        if not len(pixels):
+            return np.zeros((0, 3), dtype=np.float32), opaque, reserve
+        return ICOPalettizer.build_palette(pixels, (1 << bits) - reserve), opaque, reserve
+
+    @staticmethod
+    def quantize(rgba, palette, opaque, reserve, dither):
+        """
+        make_palette 결과로 픽셀을 팔레트 인덱스로 변환
+        반환값: (인덱스 (H, W) uint8, 팔레트 (K, 3) uint8 - 예약 색 포함)
+        """
+        height, width = rgba.shape[:2]
+        rgb = rgba[..., :3].astype(np.float32)
+        if dither and len(palette) > 1:
+            # 팔레트 색 간 평균 거리만큼의 Bayer 오프셋을 더한 뒤 가장 가까운 색으로 (오차 확산과 달리 픽셀끼리 독립)
+            gaps = np.sqrt(((palette[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2))
+            np.fill_diagonal(gaps, np.inf)
+            spread = float(np.median(gaps.min(axis=1))) / np.sqrt(3)
+            matrix = ICOPalettizer.bayer_matrix()
+            offsets = np.tile(matrix, (height // len(matrix) + 1, width // len(matrix) + 1))[:height, :width]
+            rgb = np.clip(rgb + offsets[..., None] * spread, 0, 255)
+
+        indices = np.zeros((height, width), dtype=np.uint8)
+        if len(palette):
+            indices[opaque] = ICOPalettizer.nearest(rgb[opaque], palette) + reserve
+        if reserve:
+            palette = np.vstack([np.zeros((1, 3), dtype=np.float32), palette])
+        return indices, np.clip(np.rint(palette), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def psnr(original, indices, palette, opaque):
+        """
+        premultiplied RGBA 기준 PSNR (dB)
+        디더링은 가까이서 섞여 보이므로 두 이미지 모두 3x3 평균 필터를 거친 뒤 비교한다.
+        """
+        alpha = original[..., 3:4].astype(np.float32) / 255
+        source = np.concatenate([original[..., :3] * alpha, alpha * 255], axis=2)
+        restored_alpha = opaque[..., None].astype(np.float32)
+        restored = np.concatenate([palette[indices].astype(np.float32) * restored_alpha, restored_alpha * 255], axis=2)
+
+        def blur(array):
+            padded = np.pad(array, ((1, 1), (1, 1), (0, 0)), mode='edge')
+            height, width = array.shape[:2]
+            return sum(padded[y:y + height, x:x + width] for y in range(3) for x in range(3)) / 9
+
+        mse = float(((blur(source) - blur(restored)) ** 2).mean())
+        return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+    @staticmethod
+    def palettize(image, min_psnr=DEFAULT_MIN_PSNR):
+        """
+        가장 작은 비트 수부터 (디더링 없음/있음) 후보를 만들어 품질 기준을 넘는 첫 후보를 엔트리로 반환
+        반환값: ((너비, 높이, 색상 수, 비트 수, 데이터), 이름, PSNR) 또는 기준 미달이면 (None, None, 최고 PSNR)
+        """
+        if np is None:
+            raise RuntimeError("팔레트 출력에는 numpy 가 필요합니다")
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        rgba = np.asarray(image)
+        best_psnr = 0.0
+        for bits in ICOPalettizer.BITS:
+            # 팔레트는 비트 수마다 한 번만 만들고 디더링 적용/미적용 두 가지로 매핑
+            base_palette, opaque, reserve = ICOPalettizer.make_palette(rgba, bits)
+            candidates = []
+            for dither in (False, True):
+                indices, palette = ICOPalettizer.quantize(rgba, base_palette, opaque, reserve, dither)
+                candidates.append((ICOPalettizer.psnr(rgba, indices, palette, opaque), dither, indices, palette))
+                if candidates[-1][0] == float('inf'):
+                    break  # 정확한 팔레트면 디더링 후보는 필요 없음
+            quality, dither, indices, palette = max(candidates, key=lambda c: c[0])
+            best_psnr = max(best_psnr, quality)
+            if quality < min_psnr:
+                continue
+            indexed = Image.fromarray(indices, 'P')
+            indexed.putpalette(palette.tobytes())
+            alpha = Image.fromarray(np.where(opaque, 255, 0).astype(np.uint8), 'L')
+            colors, data = ICOWriter.encode_bmp_indexed(indexed, alpha, bits)
+            width, height = image.size
+            name = f"bmp:{bits}" + (":dither" if dither else "")
+            return (width, height, colors if colors < 256 else 0, bits, data), name, quality
+        return None, None, best_psnr
+
+    @staticmethod
+    def apply(frames, entries, min_psnr=DEFAULT_MIN_PSNR, report=None, workers=None):
+        """
+        SIZES 에 해당하는 프레임을 팔레트 BMP 로 바꿔 보고, 기준을 넘고 기존 엔트리보다 작으면 교체
+        report 는 ICOOptimizer.optimize_entries 보고서 형식이며, 없으면 새로 만든다.
+        반환값: (엔트리 목록, 보고서)
+        """
+        entries = list(entries)
+        if report is None:
+            report = [{'size': entry[0], 'baseline': len(entry[4]), 'best': len(entry[4]), 'format': 'default', 'saved': 0}
+                      for entry in entries]
+        targets = [index for index, frame in enumerate(frames) if frame.size[0] in ICOPalettizer.SIZES]
+        if not targets:
+            return entries, report
+        # numpy 연산은 GIL 을 풀기 때문에 크기별 후보 계산을 스레드로 나눠도 효과가 있다
+        with ThreadPoolExecutor(max_workers=workers or min(len(targets), 4)) as pool:
+            results = list(pool.map(lambda index: ICOPalettizer.palettize(frames[index], min_psnr), targets))
+        for index, (entry, name, quality) in zip(targets, results):
+            if entry is None or len(entry[4]) >= len(entries[index][4]):
+                continue
+            entries[index] = entry
+            row = report[index]
+            row['best'] = len(entry[4])
+            row['format'] = f"{name} ({quality:.1f}dB)" if quality != float('inf') else name
+            row['saved'] = row['baseline'] - row['best']
+        return entries, report
@@ -0,0 +1,122 @@
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+_NULL_STAGE = nullcontext()
+
+
+class Instrumentation:
+    """
+    단계별 실행 시간 / 할당 크기 기록
+    꺼져 있으면 stage() 는 공용 nullcontext 를, wrap() 으로 감싼 함수는 플래그 확인 후 원래 함수를 바로 호출한다.
+    할당 크기는 tracemalloc 기준이라 파이썬 객체(bytes, 버퍼 등)만 잡히며, 여러 스레드가 동시에 실행 중이면 서로 섞인다.
+    """
+
+    def __init__(self, enabled=False, max_records=10000):
+        self.enabled = False
+        self.max_records = max_records
+        self.records = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def clear(self):
+        with self._lock:
+            self.records.clear()
+
+    def stage(self, name):
+        """with instrumentation.stage('encode'): ... 형태로 구간 측정"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def wrap(self, name):
+        """함수 전체를 한 단계로 측정하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _add(self, record):
+        with self._lock:
+            self.records.append(record)
+            if len(self.records) > self.max_records:
+                del self.records[:len(self.records) - self.max_records]
+
+    def latest(self, count=6):
+        """가장 최근에 끝난 단계들 (오래된 것부터)"""
+        with self._lock:
+            return list(self.records[-count:])
+
+    def summary_text(self, count=6):
+        """상태 표시줄용 한 줄 요약"""
+        return "  |  ".join(f"{r['name']} {r['duration'] * 1000:.1f}ms"
+                            + (f" ({r['alloc_bytes'] / 1024:.0f}KB)" if r['alloc_bytes'] else "")
+                            for r in self.latest(count))
+
+    def export_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'records': self.latest(self.max_records)}, f, ensure_ascii=False, indent=2)
+
+    def export_chrome_trace(self, path):
+        """chrome://tracing / Perfetto 에서 열 수 있는 Trace Event 형식 (완료 이벤트 'X')"""
+        events = [{
+            'name': r['name'],
+            'ph': 'X',
+            'ts': r['start'] * 1e6,
+            'dur': r['duration'] * 1e6,
+            'pid': os.getpid(),
+            'tid': r['thread'],
+            'args': {'alloc_bytes': r['alloc_bytes']},
+        } for r in self.latest(self.max_records)]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class _Stage:
+    __slots__ = ('owner', 'name', 'start', 'alloc_start')
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+
+    def __enter__(self):
+        self.alloc_start = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        alloc_end = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.owner._add({
+            'name': self.name,
+            'start': self.start - self.owner._origin,
+            'duration': end - self.start,
+            'alloc_bytes': max(0, alloc_end - self.alloc_start),
+            'thread': threading.get_ident(),
+        })
+        return False
+
+
+# 앱 전체에서 공유하는 계측기 (ICOMAKER_PROFILE=1 이면 시작부터 켜짐)
+instrumentation = Instrumentation(enabled=os.environ.get('ICOMAKER_PROFILE') == '1')
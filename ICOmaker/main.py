@@ -1,32 +1,84 @@
+import time
+STARTUP_BEGIN = time.perf_counter()  # --startup-time 기준 시각 (모듈 import 시작)
 import tkinter as tk
 import customtkinter
 from tkinter import filedialog, ttk
+# customtkinter 가 CTkImage 때문에 이미 Pillow/ImageTk 를 불러오므로 지연시켜도 이득이 없음 (import 시간에 포함)
 from PIL import Image, ImageTk
 import sys
-import struct
 import os
-import io
-from ico_generator import ICOGenerator
+import queue
+from collections import OrderedDict
+import threading
+from instrumentation import instrumentation
+IMPORT_END = time.perf_counter()
+
+LIVE_PREVIEW_DELAY_MS = 150  # 체크박스를 연달아 바꿀 때 마지막 변경 후 이 시간 동안 조용하면 렌더링
+LIVE_PREVIEW_WIDTH = 380
+LIVE_PREVIEW_GAP = 6
+LIVE_PREVIEW_MAX_SIZE = 64  # 이보다 큰 해상도는 이 크기로 줄여 표시 (작은 해상도는 실제 픽셀 크기 그대로)
+ENTRY_PHOTO_LIMIT = 16  # 엔트리 미리보기 PhotoImage 를 최근 사용한 것부터 이만큼만 유지
+
+# 생성/파싱 모듈 (NumPy 포함) 은 첫 화면을 그린 뒤 load_heavy_modules 에서 import
+ICOGenerator = ICOFile = ICOParseError = PreviewCache = ImageProcessor = ICOOptimizer = ICOEditor = None
+
+
+def load_heavy_modules():
+    global ICOGenerator, ICOFile, ICOParseError, PreviewCache, ImageProcessor, ICOOptimizer, ICOEditor
+    if ICOGenerator is not None:
+        return
+    from ico_generator import ICOGenerator
+    from ico_parser import ICOFile, ICOParseError
+    from preview_cache import PreviewCache
+    from image_processor import ImageProcessor, ICOOptimizer
+    from ico_editor import ICOEditor
+
 
 class ICOMakerGUI:
-    def __init__(self, root):
+    def __init__(self, root, report_startup=False):
         self.root = root
         self.root.title("ICO Maker GUI v0.6 (CustomTkinter)")
         self.root.geometry("1100x650")
-        self.image = None
-        self.ico_gen = ICOGenerator()
+        self.image_path = None  # 원본은 생성 시점에 필요한 해상도까지만 디코딩
+        self.ico_gen = None  # 무거운 모듈을 불러온 뒤 finish_startup 에서 생성
         self.resolution_vars = {}
         self.last_ico_path = None
         self.resolutions = [256, 128, 64, 48, 40, 32, 24, 20, 16]
-        self.ico_data = b''
-        self.entries_data = []
+        self.ico_file = None  # 현재 구조 보기에 열린 ICOFile (mmap)
+        self.ico_file_key = None
+        self.editor = None  # 편집 모드: 구조 보기 파일을 감싼 ICOEditor (첫 편집 시 생성)
+        self.preview_cache = None  # 엔트리 미리보기 LRU 캐시 (이웃 엔트리 선디코딩)
+        self.entry_photos = OrderedDict()  # (파일 키, 엔트리 인덱스) -> PhotoImage (메인 스레드 전용 LRU, 파일이 바뀌면 비움)
+        self.checker_photos = {}  # (다크 모드, 너비, 높이, 칸 크기) -> 체커보드 PhotoImage
+        self.ready = False  # 지연 생성 위젯/모듈 준비 여부
+        self.report_startup = report_startup
+        self.startup_times = {'import': IMPORT_END - STARTUP_BEGIN}
+
+        # 백그라운드 ICO 생성 작업 (작업 큐 -> 워커 스레드 -> 결과 큐 -> Tk 메인 스레드)
+        self.job_queue = queue.Queue()
+        self.result_queue = queue.Queue()
+        self.pending_jobs = []  # 아직 끝나지 않은 작업들의 취소 이벤트
+        self.worker_thread = threading.Thread(target=self.generation_worker, daemon=True)
+        self.worker_thread.start()
+
+        # 해상도별 실시간 미리보기 (변경 -> 디바운스 -> 백그라운드 렌더링 -> 메인 스레드 표시)
+        self.live_preview_after = None  # 디바운스용 after 예약 id
+        self.live_preview_key = None  # 현재 표시 대상 ((원본 경로, 수정 시각, 크기), 선명화 여부, 다크 모드)
+        self.live_preview_images = {}  # key -> {size: 체커보드 합성 RGBA (원본보다 커서 못 만들거나 렌더링에 실패한 크기는 None)}
+        self.live_preview_photos = {}  # (key, size) -> PhotoImage
+        self.live_preview_pending = 0  # 워커가 아직 응답하지 않은 요청 수
+        self.live_preview_requests = queue.Queue()
+        self.live_preview_results = queue.Queue()
+        self.live_preview_thread = threading.Thread(target=self.live_preview_worker, daemon=True)
+        self.live_preview_thread.start()
 
         # --- CustomTkinter 테마 설정 ---
         customtkinter.set_appearance_mode("System")  # "System", "Dark", "Light"
         customtkinter.set_default_color_theme("blue") # "blue", "green", "dark-blue"
 
+        # 첫 화면에는 툴바와 패널 틀만 그리고, 나머지는 첫 페인트 이후 finish_startup 에서 생성
         self.setup_ui()
-        self.style_treeview() # Treeview 스타일 적용
+        self.root.after_idle(self.on_first_paint)
 
     def setup_ui(self):
         # --- Grid 레이아웃 설정 ---
@@ -44,6 +96,13 @@ class ICOMakerGUI:
         self.generate_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
         self.open_ico_btn = customtkinter.CTkButton(self.toolbar, text="ICO 열기", command=self.open_existing_ico)
         self.open_ico_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.cancel_btn = customtkinter.CTkButton(self.toolbar, text="취소", command=self.cancel_generation, state="disabled", width=80)
+        self.cancel_btn.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.progress_bar = customtkinter.CTkProgressBar(self.toolbar, width=200)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(side=tk.LEFT, padx=(0, 10), pady=10)
+        self.progress_label = customtkinter.CTkLabel(self.toolbar, text="")
+        self.progress_label.pack(side=tk.LEFT, padx=(0, 10), pady=10)
 
         # 왼쪽: 입력 미리보기 (checkerboard 배경 추가)
         self.left_frame = customtkinter.CTkFrame(self.root)
@@ -51,8 +110,9 @@ class ICOMakerGUI:
         self.left_label = customtkinter.CTkLabel(self.left_frame, text="입력 이미지 미리보기", font=customtkinter.CTkFont(size=14, weight="bold"))
         self.left_label.pack(pady=5)
         self.preview_canvas = tk.Canvas(self.left_frame, width=256, height=256, highlightthickness=0)
-        self.preview_canvas.pack(padx=10, pady=(0, 10))
-        self.create_checkerboard_background(self.preview_canvas, 256, 256)
+        self.preview_canvas.pack(padx=10, pady=(0, 5))
+        self.load_info_label = customtkinter.CTkLabel(self.left_frame, text="", font=customtkinter.CTkFont(size=11))
+        self.load_info_label.pack(padx=10, pady=(0, 10))
 
         # 중앙: 해상도 선택
         self.mid_frame = customtkinter.CTkFrame(self.root)
@@ -60,6 +120,40 @@ class ICOMakerGUI:
         self.mid_label = customtkinter.CTkLabel(self.mid_frame, text="해상도 선택", font=customtkinter.CTkFont(size=14, weight="bold"))
         self.mid_label.pack(pady=5)
 
+        # 오른쪽: 구조 + 엔트리 미리보기 (내용은 build_deferred_ui 에서 채움)
+        self.right_frame = customtkinter.CTkFrame(self.root)
+        self.right_frame.grid(row=1, column=2, padx=(5, 10), pady=10, sticky="nsew")
+
+    def on_first_paint(self):
+        """ 첫 화면이 그려진 뒤 (idle) 호출: 첫 페인트 시간을 기록하고 나머지 초기화를 이어서 예약 """
+        self.root.update_idletasks() # 남은 배치/그리기 작업을 마친 시점을 첫 페인트로 봄
+        self.startup_times['first_paint'] = time.perf_counter() - STARTUP_BEGIN
+        self.root.after(0, self.finish_startup)
+
+    def finish_startup(self):
+        """ 무거운 모듈 import 와 화면 밖/부가 위젯 생성 (버튼 핸들러에서 먼저 필요하면 그 자리에서 실행) """
+        if self.ready:
+            return
+        start = time.perf_counter()
+        with instrumentation.stage('startup_import'):
+            load_heavy_modules()
+        self.startup_times['heavy_import'] = time.perf_counter() - start
+        self.ico_gen = ICOGenerator()
+        self.preview_cache = PreviewCache()
+        with instrumentation.stage('startup_widgets'):
+            self.build_deferred_ui()
+            self.style_treeview() # Treeview 스타일 적용
+        self.ready = True
+        self.startup_times['ready'] = time.perf_counter() - STARTUP_BEGIN
+        if self.report_startup:
+            times = self.startup_times
+            print(f"시작 시간: import {times['import'] * 1000:.1f}ms, 첫 페인트 {times['first_paint'] * 1000:.1f}ms, "
+                  f"지연 import {times['heavy_import'] * 1000:.1f}ms, 준비 완료 {times['ready'] * 1000:.1f}ms")
+            self.root.after(0, self.root.destroy)
+
+    def build_deferred_ui(self):
+        self.create_checkerboard_background(self.preview_canvas, 256, 256)
+
         self.resolutions_frame = customtkinter.CTkFrame(self.mid_frame, fg_color="transparent")
         self.resolutions_frame.pack(pady=5, padx=15, fill="x", expand=True)
 
@@ -76,9 +170,37 @@ class ICOMakerGUI:
         self.deselect_all_btn = customtkinter.CTkButton(self.res_control_frame, text="전체 해제", command=self.deselect_all, width=80)
         self.deselect_all_btn.pack(side=tk.LEFT)
 
+        self.optimize_var = tk.BooleanVar(value=False)
+        self.optimize_cb = customtkinter.CTkCheckBox(self.mid_frame, text="크기 최적화", variable=self.optimize_var)
+        self.optimize_cb.pack(pady=(0, 5), padx=15, anchor="w")
+        self.palettize_var = tk.BooleanVar(value=False)
+        self.palettize_cb = customtkinter.CTkCheckBox(self.mid_frame, text="팔레트 BMP (16~32px)", variable=self.palettize_var)
+        self.palettize_cb.pack(pady=(0, 5), padx=15, anchor="w")
+        self.sharpen_var = tk.BooleanVar(value=False)
+        self.sharpen_cb = customtkinter.CTkCheckBox(self.mid_frame, text="NumPy 축소 + 선명화", variable=self.sharpen_var)
+        self.sharpen_cb.pack(pady=(0, 10), padx=15, anchor="w")
+
+        # 해상도 체크/선명화를 바꾸면 실시간 미리보기 갱신 (연속 변경은 디바운스)
+        for var in list(self.resolution_vars.values()) + [self.sharpen_var]:
+            var.trace_add("write", lambda *_: self.schedule_live_preview())
+        self.live_preview_label = customtkinter.CTkLabel(self.left_frame, text="해상도별 미리보기", font=customtkinter.CTkFont(size=14, weight="bold"))
+        self.live_preview_label.pack(pady=(5, 0))
+        self.live_preview_canvas = tk.Canvas(self.left_frame, width=LIVE_PREVIEW_WIDTH, height=40, highlightthickness=0)
+        self.live_preview_canvas.pack(padx=10, pady=(0, 10))
+
+        # 출력 대상: 한 번 축소한 프레임으로 ICO / ICNS / favicon PNG 를 함께 저장
+        self.targets_label = customtkinter.CTkLabel(self.mid_frame, text="출력 대상", font=customtkinter.CTkFont(size=14, weight="bold"))
+        self.targets_label.pack(pady=(5, 0))
+        self.target_vars = {}
+        target_texts = {'ico': "ICO (Windows)", 'cur': "CUR 커서 (핫스팟 0,0)", 'icns': "ICNS (macOS)",
+                        'favicon': "Favicon PNG (16~512)"}
+        for target in ICOGenerator.TARGETS:
+            var = tk.BooleanVar(value=(target == 'ico'))
+            self.target_vars[target] = var
+            cb = customtkinter.CTkCheckBox(self.mid_frame, text=target_texts[target], variable=var)
+            cb.pack(padx=15, anchor="w")
+
         # 오른쪽: 구조 + 엔트리 미리보기
-        self.right_frame = customtkinter.CTkFrame(self.root)
-        self.right_frame.grid(row=1, column=2, padx=(5, 10), pady=10, sticky="nsew")
         self.right_frame.grid_columnconfigure(0, weight=2)
         self.right_frame.grid_columnconfigure(1, weight=1)
         self.right_frame.grid_rowconfigure(0, weight=1)
@@ -97,8 +219,17 @@ class ICOMakerGUI:
         self.structure_tree.heading("Value", text="값")
         self.structure_tree.column("#0", stretch=tk.YES)
         self.structure_tree.column("Value", width=100, anchor='w', stretch=tk.NO)
-        self.structure_tree.pack(fill=tk.BOTH, expand=True, pady=(0, 10), padx=10)
+        self.structure_tree.pack(fill=tk.BOTH, expand=True, pady=(0, 5), padx=10)
         self.structure_tree.bind("<<TreeviewSelect>>", self.on_tree_select)
+
+        # 편집 모드: 선택 엔트리만 바꾸고 나머지 엔트리는 원본 바이트를 그대로 복사해 저장
+        self.edit_frame = customtkinter.CTkFrame(self.tree_frame, fg_color="transparent")
+        self.edit_frame.pack(pady=(0, 10), padx=10, fill="x")
+        edit_buttons = [("크기 추가", self.add_entries), ("교체", self.replace_entry), ("삭제", self.remove_entry),
+                        ("▲", lambda: self.move_entry(-1)), ("▼", lambda: self.move_entry(1)), ("편집 저장", self.save_edits)]
+        for text, command in edit_buttons:
+            btn = customtkinter.CTkButton(self.edit_frame, text=text, command=command, width=40 if len(text) == 1 else 70)
+            btn.pack(side=tk.LEFT, padx=(0, 5))
         
         # 오른쪽 패널의 오른쪽 부분 (미리보기)
         self.preview_frame = customtkinter.CTkFrame(self.right_frame)
@@ -109,6 +240,20 @@ class ICOMakerGUI:
         self.entry_preview_canvas.pack(pady=(0, 10), padx=10)
         self.create_checkerboard_background(self.entry_preview_canvas, 256, 256)
 
+        # 하단 상태 표시줄: 작업 결과 메시지 + 단계별 소요 시간 (계측이 켜져 있을 때만 갱신)
+        self.status_bar = customtkinter.CTkFrame(self.root, corner_radius=0)
+        self.status_bar.grid(row=2, column=0, columnspan=3, sticky="ew")
+        self.profile_var = tk.BooleanVar(value=instrumentation.enabled)
+        self.profile_cb = customtkinter.CTkCheckBox(self.status_bar, text="단계별 계측", variable=self.profile_var, command=self.toggle_profiling)
+        self.profile_cb.pack(side=tk.LEFT, padx=10, pady=5)
+        self.export_trace_btn = customtkinter.CTkButton(self.status_bar, text="계측 내보내기", command=self.export_profile, width=100)
+        self.export_trace_btn.pack(side=tk.RIGHT, padx=10, pady=5)
+        self.message_label = customtkinter.CTkLabel(self.status_bar, text="", anchor="w")
+        self.message_label.pack(side=tk.LEFT, padx=10)
+        self.status_label = customtkinter.CTkLabel(self.status_bar, text="", anchor="w")
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10)
+        self.refresh_status_bar()
+
     def style_treeview(self):
         """ CustomTkinter 테마에 맞게 ttk.Treeview 스타일을 지정합니다. """
         is_dark = customtkinter.get_appearance_mode() == "Dark"
@@ -132,22 +277,166 @@ class ICOMakerGUI:
         # Treeview의 빈 공간 배경색이 적용되지 않는 문제를 해결하기 위한 트릭
         style.layout("Treeview", [('Treeview.treearea', {'sticky': 'nswe'})])
 
-    # 새: checkerboard 배경 생성 (투명 표현용)
+    # 새: checkerboard 배경 생성 (투명 표현용) - 타일 이미지 1장을 캔버스 아이템 1개로 표시
     def create_checkerboard_background(self, canvas, width, height, square_size=10):
         canvas.delete("checker")
         is_dark = customtkinter.get_appearance_mode() == "Dark"
-        colors = ["#404040", "#505050"] if is_dark else ["#e0e0e0", "#f0f0f0"]
+        colors = ("#404040", "#505050") if is_dark else ("#e0e0e0", "#f0f0f0")
         
         # 캔버스 배경색도 테마에 맞게 설정
         canvas_bg = "#404040" if is_dark else "white"
         canvas.config(bg=canvas_bg)
 
-        for y in range(0, height, square_size):
-            for x in range(0, width, square_size):
-                color = colors[(x // square_size + y // square_size) % 2]
-                canvas.create_rectangle(x, y, x + square_size, y + square_size, fill=color, outline="", tags="checker")
+        key = (is_dark, width, height, square_size)
+        if key not in self.checker_photos:
+            board = ImageProcessor.make_checkerboard(width, height, colors, square_size)
+            self.checker_photos[key] = ImageTk.PhotoImage(board)
+        canvas.create_image(0, 0, image=self.checker_photos[key], anchor="nw", tags="checker")
         canvas.lower("checker")
 
+    def toggle_profiling(self):
+        if self.profile_var.get():
+            instrumentation.enable()
+        else:
+            instrumentation.disable()
+            self.status_label.configure(text="")
+
+    def show_message(self, text):
+        """ 작업 결과/안내를 상태 표시줄에 표시 (콘솔에는 오류만 출력) """
+        self.message_label.configure(text=text)
+
+    def refresh_status_bar(self):
+        """ 계측 결과를 주기적으로 상태 표시줄에 반영 (워커 스레드 기록도 메인 스레드에서 읽음) """
+        if instrumentation.enabled:
+            self.status_label.configure(text=instrumentation.summary_text())
+        self.root.after(500, self.refresh_status_bar)
+
+    def export_profile(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", title="계측 결과 저장",
+                                            filetypes=[("Chrome trace", "*.trace.json"), ("JSON", "*.json")])
+        if not path:
+            return
+        if path.endswith(".trace.json"):
+            instrumentation.export_chrome_trace(path)
+        else:
+            instrumentation.export_json(path)
+
+    def schedule_live_preview(self, delay=LIVE_PREVIEW_DELAY_MS):
+        """ 실시간 미리보기 예약 (이미 예약돼 있으면 취소하고 다시 예약 -> 마지막 변경 기준으로 한 번만 렌더링) """
+        if self.live_preview_after is not None:
+            self.root.after_cancel(self.live_preview_after)
+        self.live_preview_after = self.root.after(delay, self.request_live_preview)
+
+    def request_live_preview(self):
+        """ 캐시에 있는 크기는 바로 그리고, 없는 크기만 워커에 렌더링 요청 """
+        self.live_preview_after = None
+        if not self.image_path:
+            self.live_preview_canvas.delete("all")
+            return
+        is_dark = customtkinter.get_appearance_mode() == "Dark"
+        # 같은 경로라도 파일 내용이 바뀌면 다른 대상이 되도록 수정 시각 + 크기까지 키에 포함 (PreviewCache.file_key 와 같은 규칙)
+        try:
+            stat = os.stat(self.image_path)
+            source_key = (os.path.abspath(self.image_path), stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            source_key = (os.path.abspath(self.image_path), None, None)
+        key = (source_key, self.sharpen_var.get(), is_dark)
+        self.live_preview_key = key
+        cached = self.live_preview_images.setdefault(key, {})
+        missing = [res for res in self.resolutions if self.resolution_vars[res].get() and res not in cached]
+        self.draw_live_preview()
+        if missing:
+            colors = ("#404040", "#505050") if is_dark else ("#e0e0e0", "#f0f0f0")
+            self.live_preview_requests.put((key, missing, colors))
+            self.live_preview_pending += 1
+            if self.live_preview_pending == 1:
+                self.root.after(50, self.poll_live_preview)
+
+    def live_preview_worker(self):
+        """ 워커 스레드: 밀린 요청은 마지막 것만 렌더링 (원본은 경로/수정 시각/크기가 바뀔 때만 다시 읽음) """
+        loaded_key = source = None
+        while True:
+            requests = [self.live_preview_requests.get()]
+            while True:
+                try:
+                    requests.append(self.live_preview_requests.get_nowait())
+                except queue.Empty:
+                    break
+            for skipped in requests[:-1]:
+                self.live_preview_results.put((skipped[0], None))
+            key, sizes, colors = requests[-1]
+            source_key, sharpen, _ = key
+            try:
+                if source_key != loaded_key:
+                    if source is not None:
+                        source.close()
+                    loaded_key = None
+                    # 가장 큰 해상도(+ 피라미드 여유 배율)까지만 한 번 디코딩해 두고 크기 조합이 바뀌어도 재사용
+                    source, _ = ImageProcessor.load_reduced(source_key[0], max(self.resolutions) * ImageProcessor.PYRAMID_HEADROOM,
+                                                            ImageProcessor.DEFAULT_MEMORY_LIMIT)
+                    loaded_key = source_key
+                valid_sizes = ICOGenerator.validate_resolutions(source.size, sizes)
+                frames = ICOGenerator.build_frames(source, valid_sizes, engine='numpy' if sharpen else 'pillow', sharpen=sharpen)
+                images = {size: None for size in sizes}
+                for size, frame in frames.items():
+                    if size > LIVE_PREVIEW_MAX_SIZE:
+                        frame = frame.resize((LIVE_PREVIEW_MAX_SIZE, LIVE_PREVIEW_MAX_SIZE), Image.Resampling.LANCZOS)
+                    shown = frame.size[0]
+                    board = ImageProcessor.make_checkerboard(shown, shown, colors, max(2, shown // 8))
+                    images[size] = ImageProcessor.composite_on_checkerboard(frame, board)
+                self.live_preview_results.put((key, images))
+            except Exception as e:
+                print(f"미리보기 렌더링 오류: {e}") # 오류는 콘솔에 출력
+                # 실패한 크기도 기록해 둬야 같은 대상으로 다시 요청하지 않음 (대상이 바뀌면 새로 시도)
+                self.live_preview_results.put((key, {size: None for size in sizes}))
+
+    def poll_live_preview(self):
+        """ Tk 메인 스레드: 렌더링 결과를 캐시에 넣고 현재 대상이면 다시 그림 """
+        redraw = False
+        while True:
+            try:
+                key, images = self.live_preview_results.get_nowait()
+            except queue.Empty:
+                break
+            self.live_preview_pending -= 1
+            if images and key in self.live_preview_images:
+                self.live_preview_images[key].update(images)
+                redraw = redraw or key == self.live_preview_key
+        if redraw:
+            self.draw_live_preview()
+        if self.live_preview_pending:
+            self.root.after(50, self.poll_live_preview)
+        elif self.live_preview_key in self.live_preview_images and any(
+                res not in self.live_preview_images[self.live_preview_key]
+                for res in self.resolutions if self.resolution_vars[res].get()):
+            self.schedule_live_preview(0)  # 건너뛴 요청에만 있던 크기가 남았으면 다시 요청
+
+    def draw_live_preview(self):
+        """ 체크된 크기를 큰 것부터 나란히 표시 (폭을 넘으면 다음 줄, 렌더링 전이면 빈 틀, 큰 해상도는 축소 표시) """
+        canvas = self.live_preview_canvas
+        canvas.delete("all")
+        canvas.config(bg="#404040" if customtkinter.get_appearance_mode() == "Dark" else "white")
+        key = self.live_preview_key
+        cached = self.live_preview_images.get(key, {})
+        x = y = row_height = 0
+        for res in self.resolutions:
+            if not self.resolution_vars[res].get() or (res in cached and cached[res] is None):
+                continue
+            shown = min(res, LIVE_PREVIEW_MAX_SIZE)
+            if x and x + shown > LIVE_PREVIEW_WIDTH:
+                x, y, row_height = 0, y + row_height + LIVE_PREVIEW_GAP, 0
+            image = cached.get(res)
+            if image is None:
+                canvas.create_rectangle(x, y, x + shown - 1, y + shown - 1, outline="gray")
+            else:
+                photo = self.live_preview_photos.get((key, res))
+                if photo is None:
+                    photo = self.live_preview_photos[(key, res)] = ImageTk.PhotoImage(image)
+                canvas.create_image(x, y, image=photo, anchor="nw")
+            x += shown + LIVE_PREVIEW_GAP
+            row_height = max(row_height, shown)
+        canvas.config(height=max(40, y + row_height))
+
     def select_all(self):
         for var in self.resolution_vars.values(): var.set(True)
 
@@ -155,107 +444,211 @@ class ICOMakerGUI:
         for var in self.resolution_vars.values(): var.set(False)
 
     def load_image(self):
+        self.finish_startup()
         filetypes = [("이미지 파일", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
         file_path = filedialog.askopenfilename(title="256x256 이상 이미지를 선택하세요", filetypes=filetypes)
         if file_path:
-            try:
-                self.image = Image.open(file_path)
-                width, height = self.image.size
-                if width < 256 or height < 256:
-                    self.image = None
-                    return
-
-                self.generate_btn.configure(state="normal")
-
-                # 미리보기 (checkerboard 위에 합성)
-                preview_img = self.image.copy()
-                preview_img.thumbnail((256, 256))
-                if preview_img.mode != 'RGBA':
-                    preview_img = preview_img.convert('RGBA')
-                self.photo = ImageTk.PhotoImage(preview_img)
-                self.preview_canvas.create_image(128, 128, image=self.photo, tags="image")
+            # 파일 대화상자 대기 시간은 빼고 로드 구간만 계측
+            with instrumentation.stage('load_image'):
+                self.load_image_file(file_path)
 
-            except Exception as e:
-                print(f"이미지 로드 실패: {e}") # 오류는 콘솔에 출력
+    def load_image_file(self, file_path):
+        try:
+            with ImageProcessor.open_unbounded(file_path) as probe: # 헤더만 읽어 크기 확인 (디코딩 없음, 초대형 원본 허용)
+                width, height = probe.size
+                frame_count = getattr(probe, 'n_frames', 1)
+            if width < 256 or height < 256:
+                self.image_path = None
+                return
+
+            self.image_path = file_path
+            self.generate_btn.configure(state="normal")
+
+            # 미리보기 (checkerboard 위에 합성) - draft/reduce 로 256px 근처까지만 디코딩
+            preview_img, stats = ImageProcessor.load_reduced(file_path, 256, ImageProcessor.DEFAULT_MEMORY_LIMIT)
+            load_info = ImageProcessor.format_load_stats(stats)
+            if frame_count > 1:
+                # 아이콘은 첫 프레임으로 만들고, 프레임별 변환은 frame_convert.py 에서
+                load_info += f"\n{frame_count}프레임 중 첫 프레임 사용"
+            self.load_info_label.configure(text=load_info)
+            self.live_preview_images.clear() # 새 원본이면 이전 원본의 렌더링 결과는 버림
+            self.live_preview_photos.clear()
+            self.schedule_live_preview(0)
+            preview_img.thumbnail((256, 256))
+            if preview_img.mode != 'RGBA':
+                preview_img = preview_img.convert('RGBA')
+            self.photo = ImageTk.PhotoImage(preview_img)
+            self.preview_canvas.create_image(128, 128, image=self.photo, tags="image")
+
+        except Exception as e:
+            print(f"이미지 로드 실패: {e}") # 오류는 콘솔에 출력
 
     def generate_ico(self):
-        if not self.image:
+        if not self.image_path:
             return
-        if not any(self.resolution_vars[res].get() for res in self.resolutions):
+        targets = [t for t in ICOGenerator.TARGETS if self.target_vars[t].get()]
+        if not targets:
+            return
+        if 'ico' in targets and not any(self.resolution_vars[res].get() for res in self.resolutions):
             return
         
         output_path = filedialog.asksaveasfilename(defaultextension=".ico", filetypes=[("ICO 파일", "*.ico")], title="ICO 파일 저장 위치")
         if output_path:
             selected_sizes = [res for res in self.resolutions if self.resolution_vars[res].get()]
-            success, message, ico_data = self.ico_gen.create_ico(self.image, selected_sizes, output_path)
-            if success:
-                self.last_ico_path = output_path
-                self.ico_data = ico_data
-                self.view_ico_structure() # ICO 생성 후 자동으로 구조 보기 실행
+            if self.ico_file and self.ico_file.path and os.path.abspath(self.ico_file.path) == os.path.abspath(output_path):
+                self.set_ico_file(None) # 덮어쓸 파일의 매핑을 먼저 해제 (Windows 에서는 매핑된 파일에 쓸 수 없음)
+            # 생성/저장/구조 파싱은 워커 스레드에서 실행 (진행 중이면 뒤에 대기)
+            cancel_event = threading.Event()
+            self.pending_jobs.append(cancel_event)
+            options = {'optimize': self.optimize_var.get(), 'palettize': self.palettize_var.get()}
+            if self.sharpen_var.get():
+                options.update(engine='numpy', sharpen=True)
+            self.job_queue.put((self.image_path, selected_sizes, targets, output_path, options, cancel_event))
+            self.cancel_btn.configure(state="normal")
+            if len(self.pending_jobs) == 1:
+                self.root.after(50, self.poll_results)
+            self.update_progress_label()
+
+    def generation_worker(self):
+        """ 워커 스레드: 작업 큐의 ICO 생성 요청을 순서대로 처리하고 결과를 결과 큐에 넣습니다. """
+        while True:
+            image_path, selected_sizes, targets, output_path, options, cancel_event = self.job_queue.get()
+            if cancel_event.is_set():
+                self.result_queue.put(("done", cancel_event, output_path, False, "ICO 생성 취소됨", None))
+                continue
+            try:
+                # 모든 출력 대상 중 가장 큰 해상도(+ 피라미드 여유 배율)까지만 디코딩
+                largest = max(size for target in targets for size in ICOGenerator.target_sizes(target, selected_sizes))
+                # 디코딩 버퍼가 메모리 한도를 넘는 초대형 원본은 띠 단위로 읽으며 축소
+                image, _ = ImageProcessor.load_reduced(image_path, largest * ImageProcessor.PYRAMID_HEADROOM,
+                                                       ImageProcessor.DEFAULT_MEMORY_LIMIT)
+            except Exception as e:
+                self.result_queue.put(("done", cancel_event, output_path, False, f"이미지 로드 실패: {e}", None))
+                continue
+
+            def on_progress(done, total, size):
+                self.result_queue.put(("progress", cancel_event, done, total, size))
+
+            # 디코딩/축소는 한 번만 하고 선택된 대상 writer 들이 같은 프레임을 나눠 씀
+            reports = []
+            success, message, _ = self.ico_gen.create_icons(image, selected_sizes, output_path, targets,
+                                                            progress_callback=on_progress, cancel_event=cancel_event,
+                                                            report_callback=reports.append, **options)
+            if success and reports:
+                # 최적화 보고서는 합계 줄만 결과 메시지에 붙여 상태 표시줄에 표시
+                message += " / 크기 최적화 " + ", ".join(ICOOptimizer.format_report(report).splitlines()[-1]
+                                                    for report in reports)
+            ico_file = self.parse_ico(output_path) if success and 'ico' in targets else None
+            self.result_queue.put(("done", cancel_event, output_path, success, message, ico_file))
+
+    def poll_results(self):
+        """ Tk 메인 스레드: 결과 큐를 비우며 진행률과 완료 결과를 화면에 반영합니다. """
+        while True:
+            try:
+                result = self.result_queue.get_nowait()
+            except queue.Empty:
+                break
+            kind, cancel_event = result[0], result[1]
+            if kind == "progress":
+                done, total, size = result[2:]
+                self.progress_bar.set(done / total)
+                self.update_progress_label(f"{size}x{size} ({done}/{total})")
             else:
-                print(f"ICO 생성 오류: {message}") # 오류는 콘솔에 출력
+                output_path, success, message, ico_file = result[2:]
+                self.pending_jobs.remove(cancel_event)
+                self.progress_bar.set(0)
+                if success:
+                    self.show_message(message)
+                if success and ico_file:
+                    self.last_ico_path = output_path
+                    self.set_ico_file(ico_file)
+                    self.show_ico_structure(ico_file) # ICO 생성 후 자동으로 구조 보기 실행
+                elif not success:
+                    print(f"ICO 생성 오류: {message}") # 오류는 콘솔에 출력
+
+        self.update_progress_label()
+        if self.pending_jobs:
+            self.root.after(50, self.poll_results)
+        else:
+            self.cancel_btn.configure(state="disabled")
+
+    def update_progress_label(self, detail=""):
+        remaining = len(self.pending_jobs)
+        if not remaining:
+            self.progress_label.configure(text="")
+            return
+        waiting = f"  대기 {remaining - 1}건" if remaining > 1 else ""
+        self.progress_label.configure(text=f"생성 중 {detail}{waiting}")
+
+    def cancel_generation(self):
+        """ 진행 중인 작업과 대기 중인 작업을 모두 취소합니다. """
+        for cancel_event in self.pending_jobs:
+            cancel_event.set()
 
     def open_existing_ico(self):
+        self.finish_startup()
         file_path = filedialog.askopenfilename(filetypes=[("ICO 파일", "*.ico")], title="ICO 파일 열기")
         if file_path:
             self.last_ico_path = file_path
-            with open(file_path, 'rb') as f:
-                self.ico_data = f.read()
             self.view_ico_structure() # ICO 열기 후 자동으로 구조 보기 실행
 
-    def parse_ico(self, data):
+    @instrumentation.wrap('parse_ico')
+    def parse_ico(self, source):
+        """ ICO 헤더/디렉터리만 파싱한 ICOFile 반환 (워커 스레드에서도 호출되므로 self 상태를 바꾸지 않습니다) """
         try:
-            reserved, type_, count = struct.unpack('<HHH', data[0:6])
-            header = {'Reserved': reserved, 'Type': type_, 'Count': count}
-            
-            entries = []
-            self.entries_data = []
-            offset = 6
-            for i in range(count):
-                width, height, colors, _, planes, bitcount, size, img_offset = struct.unpack('<BBBBHHII', data[offset:offset+16])
-                w = width if width != 0 else 256
-                h = height if height != 0 else 256
-                entries.append({
-                    'Width': w,
-                    'Height': h,
-                    'Colors': colors,
-                    'Planes': planes,
-                    'BitCount': bitcount,
-                    'Size': size,
-                    'Offset': img_offset
-                })
-                img_data = data[img_offset:img_offset + size]
-                self.entries_data.append(img_data)
-                offset += 16
-            return {'header': header, 'entries': entries}
-        except Exception as e:
+            return ICOFile(source)
+        except (ICOParseError, OSError) as e:
             print(f"ICO 파싱 오류: {e}") # 오류는 콘솔에 출력
             return None
 
+    def set_ico_file(self, ico_file):
+        """ 구조 보기 대상 파일 교체 (이전 파일의 mmap 은 닫음, 다른 파일로 바뀌면 저장하지 않은 편집은 버림) """
+        if self.ico_file is not None and self.ico_file is not ico_file:
+            self.ico_file.close()
+        if self.editor is not None and self.editor.ico_file is not ico_file:
+            self.editor = None
+        self.ico_file = ico_file
+        file_key = PreviewCache.file_key(ico_file) if ico_file else None
+        if file_key != self.ico_file_key:
+            self.entry_photos.clear()
+        self.ico_file_key = file_key
+
+    @instrumentation.wrap('view_ico_structure')
     def view_ico_structure(self):
         if not self.last_ico_path:
             # 이 함수는 이제 자동으로 호출되므로, 데이터가 없는 경우는 거의 없음. 경고창은 불필요.
             return
         
-        structure = self.parse_ico(self.ico_data)
-        if not structure:
+        ico_file = self.parse_ico(self.last_ico_path)
+        if not ico_file:
             return
-        
+        self.set_ico_file(ico_file)
+        self.show_ico_structure(ico_file)
+
+    @instrumentation.wrap('tree_render')
+    def show_ico_structure(self, ico_file, entries=None):
+        """ entries 를 넘기면 (편집 중) 파일 디렉터리 대신 그 엔트리 목록을 표시 """
         for item in self.structure_tree.get_children():
             self.structure_tree.delete(item)
         
         # 헤더 정보를 레이블에 텍스트로 표시
-        header = structure['header']
-        header_text = f"타입: {header['Type']} (1: ICO)  |  이미지 개수: {header['Count']}"
+        editing = entries is not None
+        entries = ico_file.entries if entries is None else entries
+        header_text = f"타입: {ico_file.type} (1: ICO)  |  이미지 개수: {len(entries)}"
+        if editing:
+            header_text += "  |  편집 중 (저장 안 됨)"
         self.header_info_label.configure(text=header_text)
 
-        for i, entry in enumerate(structure['entries']):
-            entry_text = f"Entry {i+1}: {entry['Width']}x{entry['Height']}, BitCount={entry['BitCount']}"
+        for i, entry in enumerate(entries):
+            entry_text = f"Entry {i+1}: {entry.width}x{entry.height}, BitCount={entry.bit_count}"
+            if editing and not self.editor.is_original(i):
+                entry_text += " (새 엔트리)"
             # open=False로 설정하여 기본적으로 닫힌 상태로 표시
             entry_id = self.structure_tree.insert("", "end", text=entry_text, values=(), tags=(str(i),), open=False)
-            for key, val in entry.items():
+            for key, val in entry.as_dict().items():
                 self.structure_tree.insert(entry_id, "end", text=key, values=(val,))
 
+    @instrumentation.wrap('on_tree_select')
     def on_tree_select(self, event):
         selected = self.structure_tree.selection()
         if not selected:
@@ -269,29 +662,150 @@ class ICOMakerGUI:
 
         # 태그를 확인하여 상위 엔트리인지, 하위 속성인지 구분
         tags = self.structure_tree.item(item, "tags")
-        if tags and tags[0].isdigit():
+        if tags and tags[0].isdigit() and self.editor is not None and self.editor.modified:
+            # 편집 중에는 인덱스가 파일과 달라지므로 캐시 없이 편집기에서 바로 디코딩
+            index = int(tags[0])
+            try:
+                self.entry_photo = ImageTk.PhotoImage(PreviewCache.make_preview(self.editor.decode(index)))
+                self.entry_preview_canvas.delete("image")
+                self.entry_preview_canvas.create_image(128, 128, image=self.entry_photo, tags="image")
+            except Exception as e:
+                self.entry_preview_canvas.delete("image")
+                print(f"미리보기 오류: {e}") # 오류는 콘솔에 출력
+        elif tags and tags[0].isdigit():
             index = int(tags[0])
-            if index < len(self.entries_data):
-                img_data = self.entries_data[index]
+            if self.ico_file and index < len(self.ico_file):
                 try:
-                    img = Image.open(io.BytesIO(img_data))
-                    if img.mode != 'RGBA':
-                        img = img.convert('RGBA')
-                    img.thumbnail((256, 256))
-                    self.entry_photo = ImageTk.PhotoImage(img)
+                    # 캐시에 없을 때만 선택한 엔트리를 디코딩, Tk 이미지는 메인 스레드에서 한 번만 생성
+                    photo_key = (self.ico_file_key, index)
+                    if photo_key in self.entry_photos:
+                        self.entry_photos.move_to_end(photo_key)
+                    else:
+                        preview = self.preview_cache.get_or_decode(self.ico_file, self.ico_file_key, index)
+                        self.entry_photos[photo_key] = ImageTk.PhotoImage(preview.image)
+                        while len(self.entry_photos) > ENTRY_PHOTO_LIMIT:
+                            self.entry_photos.popitem(last=False)  # 가장 오래 안 본 엔트리부터 버림
+                    self.entry_photo = self.entry_photos[photo_key]
                     self.entry_preview_canvas.delete("image") # 이전 이미지 삭제
                     self.entry_preview_canvas.create_image(128, 128, image=self.entry_photo, tags="image")
                 except Exception as e:
                     self.entry_preview_canvas.delete("image")
                     print(f"미리보기 오류: {e}") # 오류는 콘솔에 출력
+                # 방향키로 이동할 이웃 엔트리를 백그라운드에서 미리 디코딩
+                self.preview_cache.prefetch(self.ico_file, self.ico_file_key, [index + 1, index - 1, index + 2])
         else:
             # 하위 속성 항목을 선택한 경우 (현재는 특별한 동작 없음)
             pass
 
+    def get_editor(self):
+        """ 구조 보기에 열린 ICO 를 편집기로 감쌈 (열린 파일이 없으면 None) """
+        if self.editor is None and self.ico_file is not None:
+            self.editor = ICOEditor(self.ico_file)
+        return self.editor
+
+    def selected_entry_index(self):
+        """ 트리에서 선택한 엔트리 인덱스 (하위 속성 행이면 부모 엔트리) """
+        selected = self.structure_tree.selection()
+        if not selected:
+            return None
+        item = selected[0]
+        parent = self.structure_tree.parent(item)
+        tags = self.structure_tree.item(parent or item, "tags")
+        return int(tags[0]) if tags and tags[0].isdigit() else None
+
+    def refresh_edit_view(self, select_index=None):
+        self.show_ico_structure(self.editor.ico_file, self.editor.entries if self.editor.modified else None)
+        if select_index is not None:
+            children = self.structure_tree.get_children()
+            if select_index < len(children):
+                self.structure_tree.selection_set(children[select_index])
+
+    def ask_source_image(self, title, min_size):
+        """ 편집용 원본 이미지 선택 후 min_size 근처까지만 디코딩 """
+        filetypes = [("이미지 파일", "*.jpg *.jpeg *.png *.bmp *.gif"), ("All files", "*.*")]
+        file_path = filedialog.askopenfilename(title=title, filetypes=filetypes)
+        if not file_path:
+            return None
+        try:
+            image, _ = ImageProcessor.load_reduced(file_path, min_size * ImageProcessor.PYRAMID_HEADROOM,
+                                                   ImageProcessor.DEFAULT_MEMORY_LIMIT)
+            return image
+        except Exception as e:
+            print(f"이미지 로드 실패: {e}") # 오류는 콘솔에 출력
+            return None
+
+    def add_entries(self):
+        """ 체크된 해상도 중 파일에 없는 크기만 새로 인코딩해 추가 (CUR 이면 핫스팟은 가장 큰 기존 엔트리를 따름) """
+        editor = self.get_editor()
+        if editor is None:
+            return
+        sizes = [res for res in self.resolutions if self.resolution_vars[res].get() and res not in editor.sizes()]
+        if not sizes:
+            self.show_message("추가할 해상도가 없습니다 (체크된 해상도가 모두 파일에 있음)")
+            return
+        image = self.ask_source_image("추가할 크기의 원본 이미지를 선택하세요", max(sizes))
+        if image is None:
+            return
+        with image:
+            valid_sizes = ICOGenerator.validate_resolutions(image.size, sizes)
+            for size in valid_sizes:
+                editor.add(image, size)
+        if valid_sizes:
+            self.refresh_edit_view()
+
+    def replace_entry(self):
+        editor, index = self.get_editor(), self.selected_entry_index()
+        if editor is None or index is None:
+            return
+        image = self.ask_source_image(f"Entry {index + 1} 을 바꿀 이미지를 선택하세요", editor.entries[index].width)
+        if image is None:
+            return
+        with image:
+            editor.replace(index, image)
+        self.refresh_edit_view(index)
+
+    def remove_entry(self):
+        editor, index = self.get_editor(), self.selected_entry_index()
+        if editor is None or index is None:
+            return
+        try:
+            editor.remove(index)
+        except ValueError as e:
+            print(f"삭제 실패: {e}") # 오류는 콘솔에 출력
+            return
+        self.refresh_edit_view(min(index, len(editor) - 1))
+
+    def move_entry(self, delta):
+        editor, index = self.get_editor(), self.selected_entry_index()
+        if editor is None or index is None:
+            return
+        self.refresh_edit_view(editor.move(index, index + delta))
+
+    def save_edits(self):
+        """ 편집 결과 저장: 손대지 않은 엔트리는 원본 바이트 복사, 디렉터리만 다시 작성 """
+        editor = self.editor
+        if editor is None or not editor.modified:
+            return
+        path = editor.ico_file.path
+        output_path = filedialog.asksaveasfilename(defaultextension=".ico", filetypes=[("ICO 파일", "*.ico")],
+                                                   title="편집한 ICO 저장", initialdir=os.path.dirname(path),
+                                                   initialfile=os.path.basename(path))
+        if not output_path:
+            return
+        success, message, _ = editor.save(output_path)
+        if not success:
+            print(message) # 오류는 콘솔에 출력
+            return
+        self.show_message(message)
+        self.last_ico_path = output_path
+        self.set_ico_file(editor.ico_file)
+        self.show_ico_structure(editor.ico_file)
+
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
+    # --startup-time: import / 첫 페인트 / 준비 완료 시간을 출력하고 종료
     root = customtkinter.CTk()
-    app = ICOMakerGUI(root)
+    app = ICOMakerGUI(root, report_startup="--startup-time" in sys.argv)
     app.run()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import os
+import queue
+import threading
+from collections import OrderedDict
+
+PREVIEW_SIZE = 256
+
+
+class PreviewEntry:
+    """
+    캐시 항목: 축소된 RGBA 미리보기
+    Tk PhotoImage 는 넣지 않는다 (prefetch 스레드가 제거한 항목의 PhotoImage 가 그 스레드에서 해제되면
+    Tcl 호출이 메인 스레드를 기다리며 교착될 수 있으므로, PhotoImage 는 메인 스레드 쪽에서 따로 관리).
+    """
+    __slots__ = ('image', 'cost')
+
+    def __init__(self, image):
+        self.image = image
+        self.cost = image.size[0] * image.size[1] * 4
+
+
+class PreviewCache:
+    """
+    (파일 식별자, 엔트리 인덱스) -> 미리보기 LRU 캐시
+    픽셀 바이트 합계가 max_bytes 를 넘으면 오래 쓰지 않은 항목부터 제거하고,
+    prefetch() 로 요청한 이웃 엔트리는 백그라운드 스레드에서 미리 디코딩한다.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._worker = threading.Thread(target=self._prefetch_worker, daemon=True)
+        self._worker.start()
+
+    @staticmethod
+    def file_key(ico_file):
+        """같은 경로라도 내용이 바뀌면 다른 키가 되도록 경로 + 수정 시각 + 크기로 식별"""
+        if ico_file.path is None:
+            return ('memory', id(ico_file))
+        stat = os.stat(ico_file.path)
+        return (os.path.abspath(ico_file.path), stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def make_preview(image):
+        """디코딩된 엔트리를 미리보기용 RGBA 썸네일로 변환"""
+        if image.mode != 'RGBA':
+            image = image.convert('RGBA')
+        image.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE))
+        return image
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                self._items.move_to_end(key)
+            return entry
+
+    def put(self, key, image):
+        entry = PreviewEntry(image)
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old.cost
+            self._items[key] = entry
+            self._bytes += entry.cost
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= evicted.cost
+        return entry
+
+    def get_or_decode(self, ico_file, file_key, index):
+        """캐시에 없으면 그 자리에서 디코딩해 넣고 반환"""
+        key = (file_key, index)
+        entry = self.get(key)
+        if entry is None:
+            entry = self.put(key, self.make_preview(ico_file.decode(index)))
+        return entry
+
+    def prefetch(self, ico_file, file_key, indices):
+        """이웃 엔트리를 백그라운드에서 미리 디코딩하도록 예약"""
+        for index in indices:
+            if 0 <= index < len(ico_file) and self.get((file_key, index)) is None:
+                self._tasks.put((ico_file, file_key, index))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def _prefetch_worker(self):
+        while True:
+            ico_file, file_key, index = self._tasks.get()
+            if self.get((file_key, index)) is not None:
+                continue
+            try:
+                self.put((file_key, index), self.make_preview(ico_file.decode(index)))
+            except Exception:
+                pass  # 파일이 이미 닫혔거나 손상된 엔트리: 실제 선택 시 오류를 표시한다
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 모듈들이 ICOmaker 폴더 기준으로 서로 import 하므로 (from ico_parser import ...) 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+from PIL import Image
+from ico_editor import ICOEditor
+from ico_generator import ICOGenerator
+from ico_parser import read_directory
+
+
+def make_cursor(path, hotspot=(48, 16)):
+    source = Image.new('RGBA', (64, 64), (10, 20, 30, 255))
+    success, message, _ = ICOGenerator.create_ico(source, [32, 64], path, hotspot=hotspot)
+    assert success, message
+    return source
+
+
+def test_add_to_cursor_scales_existing_hotspot(tmp_path):
+    path = str(tmp_path / 'pointer.cur')
+    source = make_cursor(path)
+    editor = ICOEditor(path)
+    try:
+        editor.add(source, 16)
+        output_path = str(tmp_path / 'edited.cur')
+        success, message, _ = editor.save(output_path)
+        assert success, message
+    finally:
+        editor.ico_file.close()
+
+    hotspots = {entry['Width']: (entry['Planes'], entry['BitCount']) for entry in read_directory(output_path)}
+    assert hotspots == {16: (12, 4), 32: (24, 8), 64: (48, 16)}
+
+
+def test_add_to_cursor_uses_given_hotspot(tmp_path):
+    path = str(tmp_path / 'pointer.cur')
+    make_cursor(path)
+    editor = ICOEditor(path)
+    try:
+        index = editor.add(Image.new('RGBA', (128, 64), (0, 0, 0, 255)), 16, hotspot=(0, 0))
+        assert editor.entries[index].as_dict()['Planes'] == 0
+        assert editor.entries[index].as_dict()['BitCount'] == 4  # 가로로 긴 원본은 위아래 여백만큼 내려감
+    finally:
+        editor.ico_file.close()
+
+
+def test_cursor_messages_name_the_container(tmp_path):
+    source = Image.new('RGBA', (8, 8))
+    success, message, _ = ICOGenerator.create_ico(source, [256], str(tmp_path / 'x.cur'), hotspot=(0, 0))
+    assert not success
+    assert message.startswith("CUR")
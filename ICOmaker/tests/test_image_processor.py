@@ -0,0 +1,33 @@
+import numpy as np
+from PIL import Image
+from image_processor import ImageProcessor
+
+
+def make_noise(width, height, seed=1):
+    return Image.fromarray(np.random.default_rng(seed).integers(0, 256, (height, width, 3), np.uint8))
+
+
+def test_load_strips_matches_full_decode_for_multi_strip_tiff(tmp_path):
+    path = str(tmp_path / 'strips.tif')
+    make_noise(900, 1200).save(path, tiffinfo={278: 37})  # RowsPerStrip=37 -> 스트립 33개
+    with Image.open(path) as image:
+        assert len(image.tile) > 1
+
+    bounded, stats = ImageProcessor.load_reduced(path, 100, 3 * 1024 * 1024)
+    full, _ = ImageProcessor.load_reduced(path, 100)
+
+    assert stats.get('strips')
+    assert stats['peak_bytes'] <= 3 * 1024 * 1024
+    assert bounded.size == full.size
+    assert np.array_equal(np.asarray(bounded), np.asarray(full))
+
+
+def test_load_strips_matches_full_decode_for_bmp(tmp_path):
+    path = str(tmp_path / 'rows.bmp')
+    make_noise(700, 1000, seed=2).save(path)
+
+    bounded, stats = ImageProcessor.load_reduced(path, 100, 2 * 1024 * 1024)
+    full, _ = ImageProcessor.load_reduced(path, 100)
+
+    assert stats.get('strips')
+    assert np.array_equal(np.asarray(bounded), np.asarray(full))
@@ -0,0 +1,93 @@
+import random
+import struct
+
+from PIL import Image
+from ico_generator import ICOGenerator
+from image_processor import ICOOptimizer
+from ico_parser import read_directory
+
+
+def make_palette_image(width, height, opaque_colors, transparent=True):
+    """opaque_colors 개의 불투명 색상을 무작위로 흩뿌린 이미지 + (transparent 이면) 가장자리 투명 영역"""
+    rng = random.Random(opaque_colors)
+    image = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    for x in range(width):
+        for y in range(height):
+            if transparent and (x < 2 or y < 2):
+                image.putpixel((x, y), (200, 10, 30, 0))  # 투명이지만 RGB 는 임의의 값
+                continue
+            index = (x + y) % opaque_colors if x + y < opaque_colors + 2 else rng.randrange(opaque_colors)
+            image.putpixel((x, y), (index * 7, 255 - index * 5, index * 3, 255))
+    return image
+
+
+def decode_indexed_dib(data):
+    """팔레트 DIB 를 (색상 수, 팔레트, 인덱스 행 목록, AND 마스크 행 목록) 으로 (위에서 아래 순서)"""
+    _, width, height, _, bits = struct.unpack_from('<IiiHH', data, 0)
+    height //= 2
+    colors = struct.unpack_from('<I', data, 32)[0] or (1 << bits)
+    palette = [tuple(data[40 + i * 4:40 + i * 4 + 3][::-1]) for i in range(colors)]
+    offset = 40 + colors * 4
+    stride = ((width * bits + 31) // 32) * 4
+    mask_stride = ((width + 31) // 32) * 4
+    indices, mask = [], []
+    for row in range(height):
+        line = data[offset + row * stride:offset + (row + 1) * stride]
+        per_byte = 8 // bits
+        indices.append([(line[x // per_byte] >> (8 - bits * (x % per_byte + 1))) & ((1 << bits) - 1)
+                        for x in range(width)])
+    offset += stride * height
+    for row in range(height):
+        line = data[offset + row * mask_stride:offset + (row + 1) * mask_stride]
+        mask.append([(line[x // 8] >> (7 - x % 8)) & 1 for x in range(width)])
+    return colors, palette, indices[::-1], mask[::-1]
+
+
+def assert_valid_indexed(data, image):
+    colors, palette, indices, mask = decode_indexed_dib(data)
+    for y, (index_row, mask_row) in enumerate(zip(indices, mask)):
+        for x, (index, masked) in enumerate(zip(index_row, mask_row)):
+            assert index < colors  # biClrUsed 밖의 인덱스가 없어야 유효한 DIB
+            rgba = image.getpixel((x, y))
+            if masked:
+                assert rgba[3] == 0
+                assert palette[index] == (0, 0, 0)  # 투명 픽셀은 검정이어야 바탕 화면과 XOR 되지 않음
+            else:
+                assert palette[index] == rgba[:3]
+
+
+def test_indexed_candidates_reserve_black_for_transparency():
+    image = make_palette_image(16, 16, 12)
+    for name in ('bmp:4', 'bmp:8'):
+        assert name in ICOOptimizer.candidates(image)
+        data = ICOOptimizer.encode_candidate(image, name)[-1]
+        assert_valid_indexed(data, image)
+
+
+def test_full_palette_with_transparency_is_not_4bit():
+    transparent = make_palette_image(16, 16, 16)
+    assert 'bmp:4' not in ICOOptimizer.candidates(transparent)
+    assert 'bmp:8' in ICOOptimizer.candidates(transparent)
+    opaque = make_palette_image(16, 16, 16, transparent=False)
+    assert 'bmp:4' in ICOOptimizer.candidates(opaque)
+    assert_valid_indexed(ICOOptimizer.encode_candidate(opaque, 'bmp:4')[-1], opaque)
+
+
+def test_optimized_ico_entries_decode(tmp_path):
+    source = make_palette_image(48, 32, 12)
+    path = str(tmp_path / 'optimized.ico')
+    success, message, _ = ICOGenerator.create_ico(source, [16, 32], path, resample='nearest', optimize=True)
+    assert success, message
+
+    with open(path, 'rb') as f:
+        blob = f.read()
+    indexed = 0
+    for entry in read_directory(path):
+        data = blob[entry['Offset']:entry['Offset'] + entry['Size']]
+        if data.startswith(b'\x89PNG') or entry['BitCount'] not in (4, 8):
+            continue
+        indexed += 1
+        with Image.open(path) as ico:
+            frame = ico.ico.getimage((entry['Width'], entry['Height'])).convert('RGBA')
+        assert_valid_indexed(data, frame)
+    assert indexed  # 12색 + 투명 소스는 팔레트 BMP 가 가장 작아야 함
@@ -0,0 +1,252 @@
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from batch_convert import iter_sources, build_output_path, convert_one, parse_sizes
+from ico_generator import ICOGenerator
+
+MANIFEST_NAME = '.icomaker_manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    """파일 내용 SHA-256 (청크 단위로 읽어 큰 원본도 메모리에 올리지 않음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def ignore_interrupt():
+    """워커 프로세스 초기화: Ctrl+C 는 메인 프로세스만 처리 (워커는 진행 중인 작업을 마치고 종료)"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def regenerate(source_path, output_path, settings, known_hash=None, known_status='ok'):
+    """
+    워커 프로세스: 원본 해시가 manifest 와 같고 출력이 있으면 (이전에 실패한 원본이면 출력이 없어도) 건너뛰고,
+    아니면 ICO 재생성. 해시 계산도 워커에서 하므로 메인 루프는 stat 만 확인한다.
+    반환값: (원본, 출력, 상태('unchanged'|'ok'|'fail'), 해시, 메시지, 소요 시간)
+    """
+    start = time.perf_counter()
+    try:
+        digest = file_sha256(source_path)
+    except OSError as e:
+        return source_path, output_path, 'fail', None, f"원본 읽기 실패: {e}", time.perf_counter() - start
+    if digest == known_hash and (known_status == 'fail' or os.path.exists(output_path)):
+        return source_path, output_path, 'unchanged', digest, "내용 변경 없음", time.perf_counter() - start
+    _, _, success, message, _ = convert_one(source_path, output_path, settings['sizes'], settings['optimize'])
+    return source_path, output_path, 'ok' if success else 'fail', digest, message, time.perf_counter() - start
+
+
+class Manifest:
+    """
+    원본별 마지막 처리 결과 (stat, 내용 해시, 설정, 출력 경로, 상태) 를 JSON 으로 보관
+    재시작 시 stat 과 설정이 같고 출력이 남아 있는 원본은 해시 계산 없이 건너뛴다.
+    변환에 실패한 원본도 상태 'fail' 로 기록해 내용이 바뀌기 전까지 다시 변환하지 않는다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"manifest 읽기 실패, 새로 만듭니다: {e}") # 오류는 콘솔에 출력
+
+    def is_current(self, source_path, stat, settings):
+        entry = self.entries.get(source_path)
+        return (entry is not None and entry['settings'] == settings
+                and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+                and (entry.get('status') == 'fail' or os.path.exists(entry['output'])))
+
+    def known_result(self, source_path, settings):
+        """설정이 같을 때만 이전 (해시, 상태) 를 돌려줌 (설정이 바뀌면 내용이 같아도 다시 생성)"""
+        entry = self.entries.get(source_path)
+        if entry is None or entry['settings'] != settings:
+            return None, 'ok'
+        return entry['sha256'], entry.get('status', 'ok')
+
+    def update(self, source_path, stat, digest, output_path, settings, status='ok'):
+        self.entries[source_path] = {
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': digest,
+            'output': output_path,
+            'settings': settings,
+            'status': status,
+        }
+        self.dirty = True
+
+    def discard(self, source_path):
+        if self.entries.pop(source_path, None) is not None:
+            self.dirty = True
+
+    def save(self):
+        """임시 파일에 쓴 뒤 교체 (중간에 종료돼도 manifest 가 깨지지 않음)"""
+        if not self.dirty:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.dirty = False
+
+
+class SourceWatcher:
+    """
+    원본 디렉터리 폴링 감시
+    stat (mtime, 크기) 이 바뀐 파일은 debounce 초 동안 더 바뀌지 않을 때까지 기다렸다가 (저장 중인 파일 제외)
+    워커 풀에 넘기고, 동시에 제출하는 작업 수는 max_pending 으로 제한한다.
+    """
+
+    def __init__(self, source_dir, output_dir, selected_sizes, optimize=False, recursive=False,
+                 interval=1.0, debounce=2.0, workers=None, max_pending=None, manifest_path=None, report=print):
+        self.source_dir = source_dir
+        self.output_dir = output_dir
+        self.settings = {'sizes': sorted(selected_sizes, reverse=True), 'optimize': optimize}
+        self.recursive = recursive
+        self.interval = interval
+        self.debounce = debounce
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 2
+        self.manifest = Manifest(manifest_path or os.path.join(output_dir, MANIFEST_NAME))
+        self.report = report
+        self.changed = {}   # 원본 -> (stat, 마지막으로 stat 이 바뀐 시각)
+        self.pending = {}   # future -> (원본, stat)
+        self.seen = set()
+        self.summary = {'regenerated': 0, 'unchanged': 0, 'failed': 0}
+
+    def scan(self, now):
+        """stat 이 manifest 와 다른 원본을 changed 에 기록 (내용 비교는 워커에서 해시로)"""
+        seen = set()
+        for source_path, _ in iter_sources(self.source_dir, recursive=self.recursive):
+            try:
+                stat = os.stat(source_path)
+            except FileNotFoundError:
+                continue  # 스캔 중 삭제된 경우
+            seen.add(source_path)
+            previous = self.changed.get(source_path)
+            if previous is not None:
+                if (previous[0].st_mtime_ns, previous[0].st_size) != (stat.st_mtime_ns, stat.st_size):
+                    self.changed[source_path] = (stat, now)  # 아직 쓰는 중 -> 대기 시간 다시 시작
+            elif not self.manifest.is_current(source_path, stat, self.settings) and not self.is_pending(source_path):
+                self.changed[source_path] = (stat, now)
+        for source_path in self.seen - seen:
+            self.changed.pop(source_path, None)
+            self.manifest.discard(source_path)  # 원본이 지워지면 기록만 지우고 출력은 남김
+        self.seen = seen
+
+    def is_pending(self, source_path):
+        return any(source == source_path for source, _ in self.pending.values())
+
+    def submit_ready(self, executor, now):
+        """debounce 시간 동안 바뀌지 않은 원본부터 제출 (풀이 차 있으면 다음 폴링으로 미룸)"""
+        ready = [path for path, (_, changed_at) in self.changed.items() if now - changed_at >= self.debounce]
+        for source_path in ready:
+            if len(self.pending) >= self.max_pending:
+                break
+            if self.is_pending(source_path):
+                continue  # 이전 변경을 처리 중이면 끝난 뒤 다시 확인
+            stat, _ = self.changed.pop(source_path)
+            output_path = build_output_path(source_path, self.source_dir, self.output_dir)
+            known_hash, known_status = self.manifest.known_result(source_path, self.settings)
+            future = executor.submit(regenerate, source_path, output_path, self.settings, known_hash, known_status)
+            self.pending[future] = (source_path, stat)
+
+    def collect(self, done):
+        for future in done:
+            source_path, stat = self.pending.pop(future)
+            _, output_path, status, digest, message, elapsed = future.result()
+            if status == 'fail':
+                self.summary['failed'] += 1
+                self.report(f"[FAIL] {source_path} ({elapsed:.2f}s) {message}")
+                # 실패도 기록해 두고 stat 이나 내용이 바뀔 때만 다시 시도
+                self.manifest.update(source_path, stat, digest, output_path, self.settings, 'fail')
+                continue
+            if status == 'unchanged':
+                self.summary['unchanged'] += 1
+                # 내용이 같으면 이전 상태를 유지 (이전에 실패한 원본은 stat 만 새로 기록하고 계속 건너뜀)
+                _, previous_status = self.manifest.known_result(source_path, self.settings)
+                self.manifest.update(source_path, stat, digest, output_path, self.settings, previous_status)
+                continue
+            self.manifest.update(source_path, stat, digest, output_path, self.settings)
+            self.summary['regenerated'] += 1
+            self.report(f"[OK]   {source_path} -> {output_path} ({elapsed:.2f}s) {message}")
+        self.manifest.save()
+
+    def run(self, once=False):
+        """감시 루프 (once=True 이면 현재 상태만 맞추고 종료)"""
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=ignore_interrupt) as executor:
+            try:
+                while True:
+                    now = time.monotonic()
+                    self.scan(now)
+                    self.submit_ready(executor, now if not once else now + self.debounce)
+                    if self.pending:
+                        done, _ = wait(self.pending, timeout=0 if not once else None, return_when=FIRST_COMPLETED)
+                        self.collect(done)
+                    self.manifest.save()
+                    if once and not self.changed and not self.pending:
+                        break
+                    if not once:
+                        time.sleep(self.interval)
+            finally:
+                if self.pending:
+                    done, _ = wait(self.pending)
+                    self.collect(done)
+        return self.summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="원본 폴더를 감시하다가 내용이 바뀐 이미지만 ICO 로 다시 생성")
+    parser.add_argument("input", help="감시할 이미지 디렉터리")
+    parser.add_argument("-o", "--output", default="ico_output", help="ICO 출력 디렉터리")
+    parser.add_argument("-s", "--sizes", type=parse_sizes, default=list(ICOGenerator.RESOLUTIONS),
+                        help="쉼표로 구분한 해상도 목록 (기본: 전체)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="하위 디렉터리까지 감시")
+    parser.add_argument("--optimize", action="store_true", help="엔트리마다 가장 작은 무손실 인코딩 선택")
+    parser.add_argument("--interval", type=float, default=1.0, help="폴링 간격 (초)")
+    parser.add_argument("--debounce", type=float, default=2.0, help="마지막 변경 후 이 시간 동안 안정되면 처리 (초)")
+    parser.add_argument("--manifest", default=None, help=f"manifest 경로 (기본: 출력 디렉터리/{MANIFEST_NAME})")
+    parser.add_argument("--once", action="store_true", help="한 번만 동기화하고 종료")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        parser.error(f"디렉터리가 아닙니다: {args.input}")
+    watcher = SourceWatcher(args.input, args.output, args.sizes, optimize=args.optimize, recursive=args.recursive,
+                            interval=args.interval, debounce=args.debounce, workers=args.workers,
+                            manifest_path=args.manifest)
+    if not args.once:
+        print(f"감시 시작: {args.input} -> {args.output} (Ctrl+C 로 종료)")
+    try:
+        summary = watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        summary = watcher.summary
+    print(f"재생성 {summary['regenerated']}개, 변경 없음 {summary['unchanged']}개, 실패 {summary['failed']}개")
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())